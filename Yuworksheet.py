@@ -1,9 +1,14 @@
 import dash
 from dash import dcc, html, Output, Input, State
-import requests
 import json
 
+from utils.http_client import get_client
+from utils.place_cost import PlaceCost, cost_array, sum_costs, within_budget, within_level
+from utils.place_search import PLACE_TYPES, search_nearby
+from utils.result_store import ResultStore
+
 app = dash.Dash(__name__)
+RESULT_STORE = ResultStore()  # token → {'index': place_id → 列位置, 'costs': 花費陣列}
 
 API_KEY = '' 
  # 換你的 Google Maps API Key
@@ -14,31 +19,18 @@ app.layout = html.Div([
     html.Button('查詢', id='search-btn', style={'fontSize': 20}),
     html.Div(id='result', style={'fontSize': 20}),
     dcc.Checklist(id='place-selector', options=[], value=[]),
-    dcc.Store(id='all-place-details', data={}),
+    dcc.Store(id='result-token', data=None),  # 只存查詢 token，店家資料留在伺服器端（RESULT_STORE）
     html.Div(id='budget-warning', style={'color': 'red', 'marginTop': '20px', 'fontSize': 20}),
 ], style={'fontSize': 60})
 
 def get_latlng(address, apikey):
-    resp = requests.get(
-        'https://maps.googleapis.com/maps/api/geocode/json',
-        params={'address': address, 'key': apikey}
-    ).json()
+    resp = get_client().geocode(address, apikey)  # ← 共用連線池 + 快取（utils/http_client.py）
     loc = resp['results'][0]['geometry']['location']
     return loc['lat'], loc['lng']
 
 def search_places(lat, lng, apikey, radius=1000):
-    place_types = 'restaurant|cafe|bar|tourist_attraction'
-    resp = requests.get(
-        'https://maps.googleapis.com/maps/api/place/nearbysearch/json',
-        params = {
-            'location': f'{lat},{lng}',
-            'radius': radius,
-            'type': place_types, # 多種類型用 | 串起來
-            'key': apikey
-        }
-    ).json()
-    print('Nearby API response:', resp)  
-    return resp.get('results', [])   #取出'results'，'results' 不存在，函式會回傳一個空的列表（[]）
+    # 每個類型分開查並跟著 next_page_token 抓下一頁，同時進行、依 place_id 去除重複（utils/place_search.py）
+    return search_nearby(get_client(), lat, lng, apikey, radius=radius, place_types=PLACE_TYPES)
 
 
 def price_level_by_budget(budget):
@@ -54,100 +46,70 @@ def price_level_by_budget(budget):
         return 4
 
 
-#判斷「餐廳的最低價格」是否在使用者的預算以內。
-def within_budget(price_range, budget):
-    if not price_range or budget is None:
-        return False
-    try:
-        price_range = price_range.replace('$', '')
-        start_str, end_str = price_range.split('-')
-        start, end = float(start_str.strip()), float(end_str.strip())
-        return start <= budget
-    except Exception:
-        return False
-
 @app.callback(
     Output('result', 'children'),
-    Output('all-place-details', 'data'),
+    Output('result-token', 'data'),
     Input('search-btn', 'n_clicks'),
     State('address', 'value'),
     State('budget', 'value'),
 )
 def suggest(n, address, budget):
     if not address or not budget:
-        return '請輸入地址與預算', {}  #第二個值 {} 會傳給 Output('all-place-details', 'data')
+        return '請輸入地址與預算', None  #第二個值會傳給 Output('result-token', 'data')
 
     try:
         lat, lng = get_latlng(address, API_KEY)
     except Exception as e:
-        return f'地址轉經緯度錯誤: {e}', {}
+        return f'地址轉經緯度錯誤: {e}', None
 
     nearby = search_places(lat, lng, API_KEY)
     if not nearby:
-        return '附近找不到相關店家', {}
+        return '附近找不到相關店家', None
 
     max_price_level = price_level_by_budget(budget)
+    # 每家店的價位 / 價格區間只解析一次（utils/place_cost.py），預算篩選一次算完
+    records = [PlaceCost.from_place(p) for p in nearby]
+    costs = cost_array(records)
+    by_level = within_level(costs, max_price_level)
+    by_range = ~by_level & within_budget(costs, budget)
+
     results = []
-    place_details_dict = {}
-
-    for p in nearby:
-        place_details_dict[p['place_id']] = p
-        pl = p.get('price_level')
-        print(f"店名: {p.get('name','未知')}, price_level={pl} ({type(pl)}), 預算等級={max_price_level}")
-        try:
-            pl_int = int(pl) if pl is not None else None
-        except Exception as e:
-            print(f"型別轉換失敗: {e}")
-            pl_int = None
-
-        if pl_int is not None and pl_int <= max_price_level:
-            ann = f"{p.get('name','未知')} - 地址：{p.get('vicinity','無')} - 價位等級 {pl_int} - 評分 {p.get('rating','無')}"
-            results.append({'label': ann, 'value': p['place_id']})
-        elif 'price_range' in p and within_budget(p['price_range'], budget):
+    for p, record, level_ok, range_ok in zip(nearby, records, by_level, by_range):
+        if level_ok:
+            ann = f"{p.get('name','未知')} - 地址：{p.get('vicinity','無')} - 價位等級 {record.price_level} - 評分 {p.get('rating','無')}"
+        elif range_ok:
             ann = f"{p.get('name','未知')} - 地址：{p.get('vicinity','無')} - 價格區間 {p['price_range']} - 評分 {p.get('rating','無')}"
-            results.append({'label': ann, 'value': p['place_id']})
+        else:
+            continue
+        results.append({'label': ann, 'value': p['place_id']})
 
     if not results:
-        return '附近有店家，但 "價位等級" 欄位出現型別錯誤或缺值，請檢查API回傳。', {}
+        return '附近有店家，但 "價位等級" 欄位出現型別錯誤或缺值，請檢查API回傳。', None
 
+    # 伺服器端只留 place_id → 列位置 與花費陣列
+    index = {r.place_id: i for i, r in enumerate(records)}
     return dcc.Checklist(
         options=results,
         value=[],
         id='place-selector'
-    ), place_details_dict
+    ), RESULT_STORE.put({'index': index, 'costs': costs})
 
 @app.callback(
     Output('budget-warning', 'children'),
     Input('place-selector', 'value'),
     State('budget', 'value'),
-    State('all-place-details', 'data')
+    State('result-token', 'data')
 )
-def check_budget(selected_places, budget, all_details):
+def check_budget(selected_places, budget, token):
     if not selected_places or not budget:
         return ''
+    stored = RESULT_STORE.get(token)
+    if stored is None:
+        return '查詢結果已過期，請重新查詢'
 
-    total_cost = 0
-    for place_id in selected_places:
-        detail = all_details.get(place_id, {})
-        cost = 0
-        pr = detail.get('price_range')
-        if pr and '-' in pr:
-            try:
-                pr_clean = pr.replace('$', '')
-                start, end = pr_clean.split('-')
-                cost = (float(start.strip()) + float(end.strip())) / 2
-            except:
-                cost = 0
-        else:
-            pl = detail.get('price_level')
-            try:
-                pl_int = int(pl) if pl is not None else None
-            except:
-                pl_int = None
-            if pl_int:
-                level_price_map = {1: 100, 2: 300, 3: 600, 4: 1000}
-                cost = level_price_map.get(pl_int, 0)
-        total_cost += cost
+    positions = [stored['index'][pid] for pid in selected_places if pid in stored['index']]
+    total_cost = sum_costs(stored['costs'], positions)
+    total_cost = int(total_cost) if total_cost.is_integer() else total_cost
 
     if total_cost > budget:
         return f'⚠️ 超出預算 {total_cost}，請調整選擇或提高預算！'
@@ -1,23 +1,26 @@
 # Import 所有相關套件
-from dash import Dash, html, dcc, Input, State, Output, dash_table, no_update
+import os
+import diskcache
+from dash import Dash, DiskcacheManager, html, dcc, Input, State, Output, dash_table, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import pandas as pd
 import dash_leaflet as dl
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 
 # 從./utils導入所有自定義函數
-from utils.const import get_constants, TAB_STYLE, ALL_COMPARE_METRICS
-from utils.data_clean import travel_data_clean, countryinfo_data_clean, data_merge
+from utils.const import get_constants, TAB_STYLE, ALL_COMPARE_METRICS, PIE_FIELDS, MAP_METRICS, BOX_METRICS
+from utils.snapshot import load_datasets
+from utils.planner_index import PlannerIndex
+from utils.figure_cache import FigureCache, figure_code_version
+from utils.geo_index import GeoIndex
+from utils.count_cube import CountCube
+from utils.geocode_cache import GeocodeCache, cached_geocode, make_nominatim_geocoder, normalize_key
+from utils.attraction_index import AttractionIndex, attraction_marker, points_bounds
 from utils.data_transform import (
     prepare_country_compare_data, 
     get_dashboard_default_values, 
     get_alert_rank, 
     sanitize_cost_bounds, 
-    filter_by_cost_and_types, 
-    preprocess_travel_df,
-    pick_country_level,
     filter_by_alert_and_visa,
     compute_scores,
 )
@@ -34,39 +37,78 @@ from utils.visualization import (
 ########################
 #### 資料載入與前處理 ####
 ########################
-# 加載欲分析的資料集
-travel_df = pd.read_csv('./data/Travel_dataset.csv')  # 旅遊資訊
-country_info_df = pd.read_csv('./data/country_info.csv')  # 國家資訊
-attractions_df = pd.read_csv('./data/Attractions.csv')  # 景點資訊
-
-# 進行資料前處理
-travel_df = travel_data_clean(travel_df)
-country_info_df = countryinfo_data_clean(country_info_df)
-
-# 合併 travel_df 和 country_info_df，方便後續分析
-df_merged = data_merge(travel_df, country_info_df)
+# 加載欲分析的資料集：旅遊資訊、國家資訊，以及兩者合併後的 df_merged
+# （清理與合併的結果存成快照，只有 CSV 變動時才會重新計算，見 ./utils/snapshot.py）
+(travel_df, country_info_df, df_merged), DATA_VERSION = load_datasets()
 
 # 呼叫 ./utils/const.py 中的 get_constants() 函式（畫面上方四格統計）
 num_of_country, num_of_traveler, num_of_nationality, avg_days = get_constants(travel_df)
 
+# 景點資訊：每個國家的表格資料、地圖標記與範圍預先建好（座標由 python -m utils.geocode_batch 離線產生），
+# 景點 CSV 或座標檔改變時自動重建
+attraction_index = AttractionIndex()
+
 # 獲取國家名稱列表（景點頁使用）
-country_list = list(attractions_df['country'].unique())
+country_list = attraction_index.countries
 
 # 設定 Overview 頁面預設值
 DEFAULTS = get_dashboard_default_values(df_merged)
 
+# Trip Planner 國家層索引（只依賴靜態資料，啟動時建立一次）
+planner_index = PlannerIndex(travel_df, df_merged)
+
+# 景點座標快取：座標檔沒有的景點才會用到（可先執行 python -m utils.geocode_cache 預熱）
+geocode_cache = GeocodeCache()
+_geocoder = None
+
+def geocode(name):
+    # 只有快取未命中時才建立 Nominatim 地理編碼器
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = make_nominatim_geocoder()
+    return _geocoder(name)
+
 # 切換頁面（如有需要可以自行增加）
 def load_data(tab):
     if tab in ('travel', 'planner'):
         return df_merged
 
+# Overview 圖表用的洲 / 國家索引（預先分組的列位置 + ISO 國碼）
+geo_index = GeoIndex(df_merged)
+# 長條圖 / 圓餅圖用的預先彙總次數表（洲或國家 × 月份 / 類別）
+count_cube = CountCube(geo_index)
+
+# Overview 圖表快取（所有 worker 共用，資料版本或圖表程式碼改變時自動失效）
+figure_cache = FigureCache(version=f'{DATA_VERSION}-{figure_code_version()}')
+
+def warm_figure_cache():
+    # 預先建立所有下拉選單組合的圖表
+    geos = pd.concat([df_merged['Continent'], df_merged['Destination']]).dropna().unique().tolist()
+    continents = [None] + df_merged['Continent'].dropna().unique().tolist()
+    figure_cache.warm(generate_bar, df_merged, [(g,) for g in geos], count_cube=count_cube)
+    figure_cache.warm(generate_pie, df_merged, [(g, f) for g in geos for f in PIE_FIELDS], count_cube=count_cube)
+    figure_cache.warm(generate_map, df_merged, [(c, m) for c in continents for m in MAP_METRICS], geo_index=geo_index)
+    figure_cache.warm(generate_box, df_merged, [(g, m) for g in geos for m in BOX_METRICS], geo_index=geo_index)
+
+if os.environ.get('FIGURE_CACHE_WARM') == '1':
+    warm_figure_cache()
+
 ##########################
 ####   初始化應用程式   ####
 ##########################
+# 背景工作（Attractions 頁的連網地理編碼）在獨立的 process 中執行，不佔用 web worker
+background_manager = DiskcacheManager(diskcache.Cache('./cache/background'))
+
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP],
-           title='Travel Data Analysis Dashboard', suppress_callback_exceptions=True)
+           title='Travel Data Analysis Dashboard', suppress_callback_exceptions=True,
+           background_callback_manager=background_manager)
 server = app.server
 
+# 圖表快取命中統計
+@server.route('/figure-cache/stats')
+def figure_cache_stats():
+    return figure_cache.stats()
+
 # ===== 版面配置 =====
 app.layout = html.Div([
     dbc.Container([
@@ -134,8 +176,7 @@ def render_tab_content(tab):
                     ),
                     dcc.Dropdown(
                         id='dropdown-pie-2',
-                        options=[{'label': i, 'value': i}
-                                 for i in ['Traveler nationality','Age group','Traveler gender','Accommodation type','Transportation type']],
+                        options=[{'label': i, 'value': i} for i in PIE_FIELDS],
                         value=DEFAULTS["pie2_field"],
                         placeholder='Select a value',
                         style={'width': '50%','margin':'5px 0','display': 'inline-block'}
@@ -160,7 +201,7 @@ def render_tab_content(tab):
                     ),
                     dcc.Dropdown(
                         id='dropdown-map-2',
-                        options=[{'label': i, 'value': i} for i in ['Safety Index','Crime_index','CPI','PCE','Exchange_rate']],
+                        options=[{'label': i, 'value': i} for i in MAP_METRICS],
                         value=DEFAULTS["map2_metric"],
                         placeholder='Select a value',
                         style={'width': '50%','margin':'5px 0','display': 'inline-block'}
@@ -178,7 +219,7 @@ def render_tab_content(tab):
                     ),
                     dcc.Dropdown(
                         id='dropdown-box-2',
-                        options=[{'label': i, 'value': i} for i in ['Accommodation cost','Transportation cost']],
+                        options=[{'label': i, 'value': i} for i in BOX_METRICS],
                         value=DEFAULTS["box2_metric"],
                         placeholder='Select a value',
                         style={'width': '50%','margin':'5px 0','display': 'inline-block'}
@@ -307,9 +348,14 @@ def render_tab_content(tab):
             # 顯示景點列表與地圖的區域 (包在dcc.loading裡面就會在載入時顯示載入動畫)
             dcc.Loading(
                 id="attractions-loading", type="circle", color="#deb522", fullscreen=False,
-                children=[html.Div(id='attractions-output-container', style={'overflow-x': 'auto','marginTop': '10px'}),
-                          html.Div(id='attractions-map-container', style={'height': '600px','marginTop': '16px'})]
-            )
+                children=[html.Div(id='attractions-output-container', style={'overflow-x': 'auto','marginTop': '10px'})]
+            ),
+            # 座標檔沒有的景點在背景定位，進度與定位到的景點會陸續出現在地圖上
+            dcc.Store(id='attractions-pending'),
+            dbc.Progress(id='attractions-progress-bar', value=0, striped=True, animated=True,
+                         color='warning', style={'display': 'none', 'marginTop': '10px'}),
+            html.Div(id='attractions-progress', style={'color': 'white', 'marginTop': '6px'}),
+            html.Div(id='attractions-map-container', style={'height': '600px','marginTop': '16px'})
         ])
     return html.Div("選擇的標籤頁不存在。", style={'color': 'white'})
 
@@ -333,7 +379,7 @@ def update_bar_chart(dropdown_value, tab):
     geo = dropdown_value or DEFAULTS["bar1_geo"]
     
     # 呼叫自訂函數生成 bar 圖
-    fig1 = generate_bar(df, geo)
+    fig1 = figure_cache.get_figure(generate_bar, df, geo, count_cube=count_cube)
     return html.Div([dcc.Graph(id='graph1', figure=fig1)], style={'width': '90%','display': 'inline-block'})
 
 # 圓餅圖（Pie Chart）
@@ -351,7 +397,7 @@ def update_pie_chart(dropdown_value_1, dropdown_value_2, tab):
     field = dropdown_value_2 or DEFAULTS["pie2_field"]
     
     # 呼叫自訂函數生成圓餅圖
-    fig2 = generate_pie(df, geo, field)
+    fig2 = figure_cache.get_figure(generate_pie, df, geo, field, count_cube=count_cube)
     return html.Div([dcc.Graph(id='graph2', figure=fig2)], style={'width': '90%','display': 'inline-block'})
 
 # 地圖（Map Chart）
@@ -369,7 +415,7 @@ def update_map(dropdown_value_1, dropdown_value_2, tab):
     
     metric = dropdown_value_2 or DEFAULTS["map2_metric"]
     # 呼叫自訂函數生成地圖
-    fig3 = generate_map(df, geo, metric)
+    fig3 = figure_cache.get_figure(generate_map, df, geo, metric, geo_index=geo_index)
     return html.Div([dcc.Graph(id='graph3', figure=fig3)], style={'width': '90%','display': 'inline-block'})
 
 # 盒鬚圖（Box Chart）
@@ -383,7 +429,7 @@ def update_box_chart(dropdown_value_1, dropdown_value_2, tab):
     df = load_data('travel')
     geo = dropdown_value_1 or DEFAULTS["box1_geo"]
     metric = dropdown_value_2 or DEFAULTS["box2_metric"]
-    fig4 = generate_box(df, geo, metric)
+    fig4 = figure_cache.get_figure(generate_box, df, geo, metric, geo_index=geo_index)
     return html.Div([dcc.Graph(id='graph4', figure=fig4)], style={'width': '90%','display': 'inline-block'})
 
 ####################################
@@ -411,35 +457,22 @@ def update_trip_planner_table(cost_min, cost_max, acc_types,
     if tab != 'planner':
         return no_update, no_update
 
-    df_travel = travel_df.copy()
-
-    # 1) 預處理與基本過濾
+    # 1) 住宿費區間 + 住宿類型過濾，直接在預先建立的國家層索引上聚合
     cost_min, cost_max = sanitize_cost_bounds(cost_min, cost_max)
-    df_travel = preprocess_travel_df(travel_df)
-    df_travel = filter_by_cost_and_types(df_travel, cost_min, cost_max, acc_types)
+    agg = planner_index.aggregate(cost_min, cost_max, acc_types)
 
-    if df_travel.empty:
+    if agg.empty:
         return html.Div("沒有符合條件的國家。", style={'color': 'white'}), []
 
-    # 從處理過後的 df_travel 取得國家列表
-    matched_countries = sorted(df_travel['Destination'].dropna().unique().tolist())
-
     # 2) 取國家層資料並依 Alert / Visa 過濾
-    df_country = pick_country_level(df_merged, matched_countries)
+    df_country = planner_index.country_level(agg['Destination'])
     df_country = filter_by_alert_and_visa(df_country, alert_max, visa_only)
 
     if df_country.empty:
         # ← 通常是被 Travel Alert 或 Visa 過濾到 0 筆
         return html.Div("沒有符合條件的國家（被 Travel Alert / Visa 過濾掉）。", style={'color': 'white'}), []
 
-    # 聚合住宿成本到國家層級，並合併指標
-    agg = df_travel.groupby('Destination', as_index=False).agg(
-        trips=('Destination', 'count'),
-        median_daily_acc_cost=('acc_daily_cost', 'median'),
-        mean_daily_acc_cost=('acc_daily_cost', 'mean'),
-        median_trip_acc_cost=('acc_trip_cost', 'median'),
-        mean_trip_acc_cost=('acc_trip_cost', 'mean')
-    )
+    # 合併國家層指標與住宿成本聚合結果
     out = df_country.merge(agg, on='Destination', how='inner').rename(columns={'Destination': 'Country'})
 
     # 4) 計算分數（安全 + 成本）
@@ -487,10 +520,11 @@ def update_trip_planner_comparison(countries, tab):
 ###############################
 #### Attractions callback ####
 ###############################
-# 使用 geopy 套件將景點名稱轉換為經緯度，並在地圖上標示
+# 先用座標檔（與快取）中已有的座標畫出表格與地圖；其餘景點交給背景工作定位
 @app.callback(
     [Output('attractions-output-container', 'children'),
-     Output('attractions-map-container', 'children')],
+     Output('attractions-map-container', 'children'),
+     Output('attractions-pending', 'data')],
     [Input('attractions-submit', 'n_clicks'), Input('graph-tabs', 'value')],
     [State('attractions-dropdown', 'value')],
     prevent_initial_call=True
@@ -499,67 +533,91 @@ def update_attractions_output(n_clicks, tab, chosen_country):
     if tab != 'attractions':
         raise PreventUpdate
     if n_clicks == 0 or not chosen_country:
-        return (html.Div("請選擇一個國家並按下查詢。", style={'color': 'white'}), no_update)
+        return (html.Div("請選擇一個國家並按下查詢。", style={'color': 'white'}), no_update, no_update)
 
-    # 根據使用者選的國家，過濾出該國家的景點資料
-    chosen_df = attractions_df[attractions_df['country'] == chosen_country].copy()
+    # 該國家預先建好的表格資料與地圖標記
+    artifact = attraction_index.get(chosen_country)
+    if artifact is None:
+        return (html.Div("選定國家目前沒有景點資料。", style={'color': 'white'}), no_update, [])
 
     # 建立表格元件，顯示該國家的所有景點資訊
     table = dash_table.DataTable(
-        data=chosen_df.to_dict('records'), page_size=10,
+        data=artifact['records'], columns=attraction_index.columns, page_size=10,
         style_data={'backgroundColor': '#deb522', 'color': 'black'},
         style_header={'backgroundColor': 'black', 'color': '#deb522', 'fontWeight': 'bold'}
     )
 
-    # 建立地理編碼器：用來把地名轉成經緯度
-    geolocator = Nominatim(user_agent="my_dash_app")
-    # RateLimiter：避免短時間太多請求被伺服器擋掉（每次至少間隔 1 秒）
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
+    extra = [] # ← 座標檔沒處理過、但快取中已有座標的景點
+    pending = [] # ← 需要連網定位的景點 [名稱, 地址]
 
-    points = [] # ← 用來存放每個景點的名稱與座標
-    
-    # 對每一筆景點資料進行地理編碼
-    for _, r in chosen_df.iterrows():
-        name = str(r['attraction'])
-        try:
-            location = geocode(name) # ← 嘗試查詢景點的經緯度
-            if location:
-                # 若成功取得經緯度，就存進 points 清單中
-                points.append({'name': name, 'lat': location.latitude, 'lng': location.longitude})
-        except Exception:
-            # 若查詢失敗（例如找不到該景點），就跳過該筆資料
-            continue
+    # 座標檔沒處理過的景點先查快取，沒有才交給背景工作
+    for name, address in artifact['unresolved']:
+        hit, latlng = geocode_cache.get(normalize_key(name, address))
+        if not hit:
+            pending.append([name, address])
+        elif latlng:
+            extra.append({'name': name, 'lat': latlng[0], 'lng': latlng[1]})
+    points = artifact['points'] + extra
 
-    if not points:
-        return table, html.Div("選定國家目前沒有可用座標的景點。", style={'color': 'white'})
+    if not points and not pending:
+        return table, html.Div("選定國家目前沒有可用座標的景點。", style={'color': 'white'}), []
 
     # 建立地圖底圖圖層（使用 OpenStreetMap）
     tile_layer = dl.TileLayer(
         url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
         attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
     )
-    
-    # 為每個景點建立一個 Marker（地圖上的小釘子），滑鼠移過去會顯示名稱
-    markers = [dl.Marker(position=[p['lat'], p['lng']], children=dl.Tooltip(p['name'])) for p in points]
 
-    # 取出所有經緯度
-    lats = [p['lat'] for p in points]; lngs = [p['lng'] for p in points]
-    # 計算地圖顯示的範圍（最南西角 ~ 最北東角）
-    south, west = min(lats), min(lngs); north, east = max(lats), max(lngs)
-    bounds = [[south, west], [north, east]]
+    markers = artifact['markers'] + [attraction_marker(p) for p in extra]
+    # 背景定位到的景點會放進這個圖層
+    layers = [tile_layer, dl.LayerGroup(markers), dl.LayerGroup(id='attractions-live-markers', children=[])]
+
+    if not points:
+        # 還沒有任何座標 → 先顯示世界地圖，等背景工作補上景點
+        the_map = dl.Map(id=f"map-{chosen_country}-{n_clicks}", children=layers,
+                         center=[20, 0], zoom=2, style={'width': '100%','height': '600px'})
+        return table, the_map, pending
+
+    # 地圖顯示的範圍（最南西角 ~ 最北東角）；只有快取補上座標時才需要重算
+    bounds = points_bounds(points) if extra else artifact['bounds']
 
     if len(points) == 1:
         # 若只有一個點 → 直接置中顯示
         center = [points[0]['lat'], points[0]['lng']]
         the_map = dl.Map(id=f"map-{hash(str(bounds))}",
-                         children=[tile_layer, dl.LayerGroup(markers)],
+                         children=layers,
                          center=center, zoom=10, style={'width': '100%','height': '600px'})
     else:
         # 多個點 → 根據 bounds 自動調整視野
         the_map = dl.Map(id=f"map-{hash(str(bounds))}",
-                         children=[tile_layer, dl.LayerGroup(markers)],
+                         children=layers,
                          bounds=bounds, style={'width': '100%','height': '600px'})
-    return table, the_map
+    return table, the_map, pending
+
+
+# 背景工作：逐一定位 pending 的景點（Nominatim 每秒一次），每定位一個就更新地圖圖層與進度
+@app.callback(
+    Output('attractions-progress', 'children'),
+    Input('attractions-pending', 'data'),
+    background=True,
+    progress=[Output('attractions-live-markers', 'children'),
+              Output('attractions-progress-bar', 'value'),
+              Output('attractions-progress-bar', 'label')],
+    running=[(Output('attractions-progress-bar', 'style'),
+              {'display': 'flex', 'marginTop': '10px'}, {'display': 'none'})],
+    cancel=[Input('graph-tabs', 'value')],
+    prevent_initial_call=True
+)
+def geocode_pending_attractions(set_progress, pending):
+    if not pending:
+        return ''
+    points = []
+    for done, (name, address) in enumerate(pending, start=1):
+        latlng = cached_geocode(geocode_cache, geocode, name, address)
+        if latlng:
+            points.append({'name': name, 'lat': latlng[0], 'lng': latlng[1]})
+        set_progress(([attraction_marker(p) for p in points], 100 * done / len(pending), f'{done}/{len(pending)}'))
+    return f'已在背景定位 {len(pending)} 個景點，找到 {len(points)} 個座標。'
 
 if __name__ == '__main__':
     app.run(debug=False)
@@ -1,9 +1,18 @@
 from dash import Dash, html, dcc, Input, Output, State, dash_table, ctx
+from flask import jsonify, request
 import dash_bootstrap_components as dbc
+import dash_leaflet as dl
 import pandas as pd
 import plotly.graph_objs as go
+import numpy as np
+import math
 import os
 
+from utils.text_search import load_text_index
+from utils.spatial_index import SpatialIndex
+from utils.map_cluster import build_cluster_indexes
+from utils.itinerary import BUDGET_TYPES, fill_budget, wishlist_candidates
+
 
 #44444
 # =======================================
@@ -23,15 +32,19 @@ def load_data() -> pd.DataFrame:
         # 活動沒有具體地址 → 用縣市代替
         if category == "活動" and "City" in df.columns:
             df["Add"] = df["City"]
-        for col in ["Name", "Add", "Tel", "City"]:
+        for col in ["Name", "Add", "Tel", "City", "Desc"]:
             if col not in df.columns:
                 df[col] = ""
-        return df[["Name", "Add", "Tel", "City", "Category"]]
+        # X座標 / Y座標 → 經緯度（給空間索引用），沒有座標的列為 NaN
+        for col in ["Lat", "Lng"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+        return df[["Name", "Add", "Tel", "City", "Category", "Desc", "Lat", "Lng"]]
 
-    mappings_views = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City"}
-    mappings_food = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City"}
-    mappings_acco = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City"}
-    mappings_act = {"名稱": "Name", "縣市": "City", "電話": "Tel"}
+    # Desc（簡述 / 詳細說明）給全文搜尋用，不顯示在表格
+    mappings_views = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City", "簡述": "Desc", "Y座標": "Lat", "X座標": "Lng"}
+    mappings_food = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City", "簡述": "Desc", "Y座標": "Lat", "X座標": "Lng"}
+    mappings_acco = {"名稱": "Name", "地址": "Add", "電話": "Tel", "縣市": "City", "簡述": "Desc", "Y座標": "Lat", "X座標": "Lng"}
+    mappings_act = {"名稱": "Name", "縣市": "City", "電話": "Tel", "詳細說明": "Desc", "Y座標": "Lat", "X座標": "Lng"}
 
     views = pd.read_csv(os.path.join(base_dir, "data", "views.csv"))
     food = pd.read_csv(os.path.join(base_dir, "data", "food.csv"))
@@ -48,7 +61,85 @@ def load_data() -> pd.DataFrame:
         ignore_index=True,
     ).reset_index(drop=True)
 
-    return combined.fillna("")
+    text_cols = ["Name", "Add", "Tel", "City", "Category", "Desc"]
+    combined[text_cols] = combined[text_cols].fillna("")
+    combined["id"] = np.arange(len(combined))  # ← 列位置當 row id，跨頁選取也不會錯位
+    return combined
+
+
+# =======================================
+# 旅遊清單：伺服器端分頁 / 篩選 / 排序
+# =======================================
+FILTER_OPERATORS = [
+    ["ge ", ">="], ["le ", "<="], ["lt ", "<"], ["gt ", ">"],
+    ["ne ", "!="], ["eq ", "="], ["contains "], ["datestartswith "],
+]
+
+
+def split_filter_part(filter_part: str):
+    """把 DataTable 的 filter_query 片段（例如 {Name} contains 金門）拆成 (欄位, 運算子, 值)"""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find("{") + 1 : name_part.rfind("}")]
+                value_part = value_part.strip()
+                v0 = value_part[:1]
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', "`"):
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                else:
+                    value = value_part
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+
+def apply_filter_query(df: pd.DataFrame, filter_query: str) -> pd.DataFrame:
+    """依 filter_query 篩選（只處理已縮小範圍的 df，不掃描整份資料）"""
+    for part in (filter_query or "").split(" && "):
+        col, op, value = split_filter_part(part)
+        if col not in df.columns:
+            continue
+        s = df[col].astype(str)
+        if op == "contains":
+            df = df[s.str.contains(value, regex=False)]
+        elif op == "datestartswith":
+            df = df[s.str.startswith(value)]
+        elif op in ("eq", "="):
+            df = df[s == value]
+        elif op in ("ne", "!="):
+            df = df[s != value]
+        elif op in ("lt", "<"):
+            df = df[s < value]
+        elif op in ("le", "<="):
+            df = df[s <= value]
+        elif op in ("gt", ">"):
+            df = df[s > value]
+        elif op in ("ge", ">="):
+            df = df[s >= value]
+    return df
+
+
+ALL = "全部"
+TABLE_COLUMNS = ["id", "Name", "Add", "Tel", "Category"]
+SEARCH_FIELDS = [("Name", 3.0), ("Desc", 1.0)]  # ← 全文搜尋欄位與權重（名稱比介紹重要）
+MAP_CENTER, MAP_ZOOM = [23.7, 121.0], 7  # ← 地圖初始畫面（台灣全島）
+
+
+def build_travel_lookup(df: pd.DataFrame) -> dict:
+    """
+    (類別, 縣市) → 列位置 (ndarray)，載入資料時建立一次。
+    包含「全部」萬用鍵：(類別, 全部)、(全部, 縣市)、(全部, 全部)，
+    任何下拉選單組合都只要查一次 dict，不必掃描整份資料。
+    """
+    positions = np.arange(len(df))
+    lookup = {(ALL, ALL): positions}
+    for category, idx in df.groupby("Category").indices.items():
+        lookup[(category, ALL)] = np.asarray(idx)
+    for city, idx in df.groupby("City").indices.items():
+        lookup[(ALL, city)] = np.asarray(idx)
+    for (category, city), idx in df.groupby(["Category", "City"]).indices.items():
+        lookup[(category, city)] = np.asarray(idx)
+    return lookup
 
 
 # =======================================
@@ -56,6 +147,13 @@ def load_data() -> pd.DataFrame:
 # =======================================
 def create_app() -> Dash:
     travel_df = load_data()
+    travel_lookup = build_travel_lookup(travel_df)
+    table_df = travel_df[TABLE_COLUMNS]  # ← 預先投影表格欄位，篩選時直接 take
+    search_index = load_text_index([(travel_df[col].tolist(), w) for col, w in SEARCH_FIELDS])
+    spatial_index = SpatialIndex(travel_df, lat_col="Lat", lng_col="Lng", category_col="Category")
+    cluster_index = build_cluster_indexes(spatial_index)  # ← 地圖標記依縮放層級預先分群
+    poi_names = travel_df["Name"].to_numpy(dtype=object)
+    empty = np.array([], dtype=np.intp)
     category_options = [
         {"label": c, "value": c} for c in sorted(travel_df["Category"].unique())
     ]
@@ -66,6 +164,29 @@ def create_app() -> Dash:
     app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
     server = app.server
 
+    # 附近的 POI（本機空間索引，不必呼叫 Google Nearby Search）
+    # /api/nearby?lat=25.03&lng=121.56&k=10 或 &radius=2（km），可加 &category=食物
+    @server.route("/api/nearby")
+    def nearby():
+        try:
+            lat = float(request.args["lat"])
+            lng = float(request.args["lng"])
+            radius = float(request.args["radius"]) if request.args.get("radius") else None
+            k = int(request.args.get("k", 10 if radius is None else 100))
+        except (KeyError, ValueError):
+            return jsonify({"error": "lat / lng / radius / k 必須是數字"}), 400
+        # float() 接受 "nan" / "inf"，k 為負數時切片會從尾端算起，一律視為無效參數
+        if not all(math.isfinite(v) for v in (lat, lng, radius if radius is not None else 0.0)) or k <= 0:
+            return jsonify({"error": "lat / lng / radius / k 必須是數字"}), 400
+        category = request.args.get("category") or None
+        if radius is not None:
+            positions, dist = spatial_index.within_radius(lat, lng, radius, category)
+            positions, dist = positions[:k], dist[:k]
+        else:
+            positions, dist = spatial_index.nearest(lat, lng, k, category)
+        rows = travel_df.iloc[positions][["Name", "Add", "Tel", "City", "Category", "Lat", "Lng"]]
+        return jsonify(rows.assign(distance_km=dist.round(3)).to_dict("records"))
+
     app.layout = html.Div(
         style={"backgroundColor": "#FFFFFF", "minHeight": "100vh", "padding": "40px"},
         children=[
@@ -108,7 +229,48 @@ def create_app() -> Dash:
                                                 width=6,
                                             ),
                                         ]
-                                    )
+                                    ),
+                                    dbc.Row(
+                                        dbc.Col(
+                                            [
+                                                html.Label("關鍵字搜尋（名稱、介紹）", style={"fontWeight": "bold"}),
+                                                dcc.Input(
+                                                    id="search-input",
+                                                    type="search",
+                                                    placeholder="例如：牛肉麵、金門 咖啡",
+                                                    debounce=True,
+                                                    className="form-control",
+                                                ),
+                                            ],
+                                            width=12,
+                                        ),
+                                        className="mt-3",
+                                    ),
+                                ]
+                            )
+                        ],
+                        className="shadow-sm mb-4",
+                        style={"borderRadius": "12px"},
+                    ),
+                    # 地圖：只載入目前畫面範圍內的群集與地點
+                    dbc.Card(
+                        [
+                            dbc.CardBody(
+                                [
+                                    html.H5("🗺️ 地圖", style={"color": "#0d6efd"}),
+                                    dl.Map(
+                                        id="poi-map",
+                                        center=MAP_CENTER,
+                                        zoom=MAP_ZOOM,
+                                        children=[
+                                            dl.TileLayer(
+                                                url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+                                                attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors',
+                                            ),
+                                            dl.LayerGroup(id="poi-layer"),
+                                        ],
+                                        style={"width": "100%", "height": "500px", "borderRadius": "10px"},
+                                    ),
                                 ]
                             )
                         ],
@@ -129,9 +291,16 @@ def create_app() -> Dash:
                                             {"name": "電話", "id": "Tel"},
                                             {"name": "類別", "id": "Category", "hidden": True},
                                         ],
-                                        data=travel_df.to_dict("records"),
+                                        data=[],
                                         row_selectable="multi",
+                                        page_current=0,
                                         page_size=10,
+                                        page_action="custom",
+                                        filter_action="custom",
+                                        filter_query="",
+                                        sort_action="custom",
+                                        sort_mode="single",
+                                        sort_by=[],
                                         style_table={"borderRadius": "10px", "overflow": "hidden"},
                                         style_header={"backgroundColor": "#f8f9fa", "fontWeight": "bold"},
                                         style_cell={"backgroundColor": "#fff", "color": "#000", "textAlign": "left", "padding": "8px"},
@@ -180,6 +349,8 @@ def create_app() -> Dash:
                                         ],
                                         data=[],
                                         row_deletable=True,
+                                        row_selectable="multi",
+                                        selected_rows=[],
                                         editable=True,
                                         style_header={"backgroundColor": "#f8f9fa", "fontWeight": "bold"},
                                         style_cell={"backgroundColor": "#fff", "color": "#000", "padding": "8px"},
@@ -204,6 +375,13 @@ def create_app() -> Dash:
                                             dbc.Col(dbc.InputGroup([dbc.InputGroupText("景預算"), dbc.Input(id="budget-transport", type="number", value=0, min=0)]), width=3),
                                         ]
                                     ),
+                                    html.Button(
+                                        "🎯 填滿預算",
+                                        id="fill-budget",
+                                        n_clicks=0,
+                                        className="btn btn-outline-primary mt-3",
+                                    ),
+                                    html.Div(id="fill-budget-summary", style={"marginTop": "8px"}),
                                     dcc.Graph(id="budget-pie"),
                                     html.Div(id="remaining-budget", style={"fontWeight": "bold", "fontSize": "18px", "marginTop": "10px"}),
                                 ]
@@ -218,25 +396,83 @@ def create_app() -> Dash:
     )
 
     # ===== Callbacks =====
+    # 只回傳目前這一頁：先用 (類別, 縣市) 索引取出列，再依關鍵字排名、篩選、排序、切頁
     @app.callback(
-        Output("travel-table", "data"),
-        [Input("category-dropdown", "value"), Input("city-dropdown", "value")],
+        [Output("travel-table", "data"), Output("travel-table", "page_count"), Output("travel-table", "page_current")],
+        [
+            Input("category-dropdown", "value"),
+            Input("city-dropdown", "value"),
+            Input("search-input", "value"),
+            Input("travel-table", "page_current"),
+            Input("travel-table", "page_size"),
+            Input("travel-table", "sort_by"),
+            Input("travel-table", "filter_query"),
+        ],
     )
-    def filter_travel_table(category, city):
-        df = travel_df.copy()
-        if category != "全部":
-            df = df[df["Category"] == category]
-        if city != "全部":
-            df = df[df["City"] == city]
-        return df[["Name", "Add", "Tel", "Category"]].to_dict("records")
+    def filter_travel_table(category, city, search, page_current, page_size, sort_by, filter_query):
+        positions = travel_lookup.get((category, city), empty)
+        if search and search.strip():
+            # 關鍵字搜尋：依相關程度排序，只保留目前類別 / 縣市內的結果
+            ranked, _ = search_index.search(search)
+            if (category, city) != (ALL, ALL):
+                ranked = ranked[np.isin(ranked, positions, assume_unique=True)]
+            positions = ranked
+        df = table_df.take(positions)
+        df = apply_filter_query(df, filter_query)
+
+        if sort_by:
+            df = df.sort_values(
+                sort_by[0]["column_id"], ascending=sort_by[0]["direction"] == "asc", kind="stable"
+            )
+
+        # 切換類別、縣市、關鍵字或篩選條件時回到第一頁
+        if ctx.triggered_id in ("category-dropdown", "city-dropdown", "search-input") or (
+            ctx.triggered and ctx.triggered[0]["prop_id"].endswith(".filter_query")
+        ):
+            page_current = 0
+        page_size = page_size or 10
+        page_count = max(1, -(-len(df) // page_size))
+        page_current = min(page_current or 0, page_count - 1)
+
+        start = page_current * page_size
+        page = df.iloc[start : start + page_size]
+        return page.to_dict("records"), page_count, page_current
+
+    # 地圖移動 / 縮放或切換類別時，只回傳畫面範圍內的群集（圓圈 + 數量）與個別地點
+    @app.callback(
+        Output("poi-layer", "children"),
+        [Input("poi-map", "bounds"), Input("poi-map", "zoom"), Input("category-dropdown", "value")],
+    )
+    def update_poi_layer(bounds, zoom, category):
+        index = cluster_index.get(None if category == ALL else category)
+        if index is None:
+            return []
+        lats, lngs, counts, positions = index.viewport(bounds, MAP_ZOOM if zoom is None else zoom)
+        layer = []
+        for lat, lng, count, pos in zip(lats.tolist(), lngs.tolist(), counts.tolist(), positions.tolist()):
+            if pos >= 0:
+                layer.append(dl.Marker(position=[lat, lng], children=dl.Tooltip(poi_names[pos])))
+            else:
+                layer.append(
+                    dl.CircleMarker(
+                        center=[lat, lng],
+                        radius=min(10 + 6 * np.log10(count), 30),
+                        color="#0d6efd",
+                        fillOpacity=0.6,
+                        children=dl.Tooltip(f"{count:,}", permanent=True, direction="center"),
+                    )
+                )
+        return layer
 
     # 合併「加入願望清單」與「新增空白列」
+    # 旅遊清單是伺服器端分頁，選取的列以 row id（列位置）從 travel_df 取回
+    # 願望清單的列記下 poi_id（同一個列位置），填滿預算時用來取回座標等價值指標
     @app.callback(
-        [Output("wishlist-table", "data"), Output("travel-table", "selected_rows")],
+        [Output("wishlist-table", "data"), Output("travel-table", "selected_rows"), Output("travel-table", "selected_row_ids")],
         [Input("add-to-wishlist", "n_clicks"), Input("add-empty-row", "n_clicks")],
-        [State("travel-table", "selected_rows"), State("travel-table", "data"), State("wishlist-table", "data")],
+        [State("travel-table", "selected_row_ids"), State("wishlist-table", "data")],
     )
-    def update_wishlist(add_clicks, empty_clicks, selected_rows, travel_data, wishlist_data):
+    def update_wishlist(add_clicks, empty_clicks, selected_row_ids, wishlist_data):
         wishlist_data = wishlist_data or []
         triggered = ctx.triggered_id
 
@@ -244,20 +480,43 @@ def create_app() -> Dash:
 
         # 新增空白列
         if triggered == "add-empty-row":
-            wishlist_data.append({"name": "", "type": "", "price": 0})
-            return wishlist_data, []
+            wishlist_data.append({"name": "", "type": "", "price": 0, "poi_id": None})
+            return wishlist_data, [], []
 
         #  加入願望清單
-        if triggered == "add-to-wishlist" and selected_rows:
+        if triggered == "add-to-wishlist" and selected_row_ids:
             names_in_wishlist = {item["name"] for item in wishlist_data}
-            for idx in selected_rows:
-                row = travel_data[idx]
+            for row_id in selected_row_ids:
+                row = travel_df.iloc[int(row_id)]
                 name = row["Name"]
                 if name not in names_in_wishlist:
                     src_cat = row.get("Category", "")
                     wish_type = type_map.get(src_cat, "活")
-                    wishlist_data.append({"name": name, "type": wish_type, "price": 0})
-        return wishlist_data, []
+                    wishlist_data.append({"name": name, "type": wish_type, "price": 0, "poi_id": int(row_id)})
+                    names_in_wishlist.add(name)
+        return wishlist_data, [], []
+
+    # 填滿預算：在各類型預算內挑出願望清單中價值最高的組合（utils/itinerary.py），以勾選標示
+    # 價值依 poi_id 取回的指標計算（目前資料只有座標 → 離清單中其他地點越近越好）
+    @app.callback(
+        [Output("wishlist-table", "selected_rows"), Output("fill-budget-summary", "children")],
+        Input("fill-budget", "n_clicks"),
+        [
+            State("budget-food", "value"),
+            State("budget-clothing", "value"),
+            State("budget-housing", "value"),
+            State("budget-transport", "value"),
+            State("wishlist-table", "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def suggest_wishlist(n_clicks, food, clothing, housing, transport, wishlist_data):
+        if not wishlist_data:
+            return [], "願望清單是空的"
+        budgets = dict(zip(BUDGET_TYPES, [food or 0, clothing or 0, housing or 0, transport or 0]))
+        result = fill_budget(wishlist_candidates(wishlist_data, travel_df), budgets)
+        summary = "、".join(f"{t} {result['spent'][t]:,.0f}/{budgets[t]:,.0f}" for t in BUDGET_TYPES)
+        return result["selected"].tolist(), f"建議勾選 {len(result['selected'])} 項（{summary} 元）"
 
     @app.callback(
         Output("budget-pie", "figure"),
@@ -273,6 +532,7 @@ def create_app() -> Dash:
 
 
     # 顯示「食 50000 - 32000 = 18000 元」，空白類型也列入總支出
+    # 有勾選（手動或「填滿預算」建議）時只計入勾選的項目，沒有勾選時計入整個願望清單
     @app.callback(
         Output("remaining-budget", "children"),
         [
@@ -281,15 +541,21 @@ def create_app() -> Dash:
             Input("budget-housing", "value"),
             Input("budget-transport", "value"),
             Input("wishlist-table", "data"),
+            Input("wishlist-table", "selected_rows"),
         ],
     )
-    def update_remaining(food, clothing, housing, transport, wishlist_data):
+    def update_remaining(food, clothing, housing, transport, wishlist_data, selected_rows):
         budget = {"食": food or 0, "活": clothing or 0, "住": housing or 0, "景": transport or 0}
         spent = {"食": 0, "活": 0, "住": 0, "景": 0}
         untyped_spent = 0  # 用來記錄空白類型的支出
 
+        items = wishlist_data or []
+        selected = [i for i in selected_rows or [] if 0 <= i < len(items)]
+        if selected:
+            items = [items[i] for i in selected]
+
         # 累加各類型支出，空白類型另記
-        for item in wishlist_data or []:
+        for item in items:
             t = item.get("type", "")
             price = float(item.get("price", 0) or 0)
             if t in spent:
@@ -305,6 +571,13 @@ def create_app() -> Dash:
 
         # 顯示每一類預算狀況
         rows = []
+        if selected:
+            rows.append(
+                html.Div(
+                    f"✅ 只計入已勾選的 {len(selected)} 項",
+                    style={"color": "#0d6efd", "fontSize": "14px", "marginBottom": "3px"},
+                )
+            )
         for k in ["食", "活", "住", "景"]:
             rows.append(
                 html.Div(
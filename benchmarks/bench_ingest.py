@@ -0,0 +1,72 @@
+"""
+Travel_dataset.csv 讀取清理比較：travel_data_clean vs. travel_data_clean_chunked。
+
+每種方式在獨立的子程序中執行，量測峰值 RSS 與執行時間。
+使用方式（在專案根目錄）：python -m benchmarks.bench_ingest [--rows 2000000] [--chunksize 100000]
+--rows 會把 Travel_dataset.csv 重複到指定列數，模擬正式環境的大型旅遊紀錄。
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run_worker(mode, path, chunksize):
+    import pandas as pd
+    from utils.data_clean import travel_data_clean, travel_data_clean_chunked
+
+    t = time.perf_counter()
+    if mode == 'full':
+        df = travel_data_clean(pd.read_csv(path))
+    else:
+        df = travel_data_clean_chunked(path, chunksize=chunksize)
+    elapsed = time.perf_counter() - t
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # Linux: KB
+        'result_mb': df.memory_usage(deep=True).sum() / 1024 ** 2,
+        'rows': len(df),
+    }))
+
+
+def make_csv(path, rows):
+    import pandas as pd
+
+    base = pd.read_csv(os.path.join(ROOT, 'data', 'Travel_dataset.csv'), dtype=str)
+    repeat = -(-rows // len(base))
+    pd.concat([base] * repeat, ignore_index=True).head(rows).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--worker', choices=['full', 'chunked'])
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.path, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'travel.csv')
+        make_csv(path, args.rows)
+        print(f'input: {args.rows} rows, {os.path.getsize(path) / 1024 ** 2:.1f} MB, chunksize={args.chunksize}')
+        print(f'{"mode":>8} {"seconds":>8} {"peak RSS (MB)":>14} {"result (MB)":>12}')
+        for mode in ['full', 'chunked']:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', mode, '--path', path,
+                                  '--chunksize', str(args.chunksize)], capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f'{mode:>8} {r["seconds"]:>8.2f} {r["peak_rss_mb"]:>14.1f} {r["result_mb"]:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
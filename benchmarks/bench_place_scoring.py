@@ -0,0 +1,137 @@
+"""
+推薦分數計算比較：原本逐筆迴圈的 calculate_weighted_score vs. 批次 score_places。
+
+以隨機產生的 Nearby Search 結果（台灣範圍內的座標、部分沒有價位 / 座標）測試，
+比較三種方式的時間，並確認三者的分數與排序相同：
+    loop    原本的逐筆迴圈（保留在本檔的 legacy_weighted_score）
+    adapter jimmyworksheet 的 calculate_weighted_score（dict 進、dict 出，內部呼叫 score_places）
+    batch   utils.place_scoring.score_places（直接傳入陣列）
+使用方式（在專案根目錄）：python -m benchmarks.bench_place_scoring [--sizes 10000 1000000]
+"""
+import argparse
+import copy
+import importlib.util
+import os
+import sys
+import time
+from importlib.machinery import SourceFileLoader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from utils.place_scoring import score_places
+
+
+def legacy_calculate_distance(lat1, lng1, lat2, lng2):
+    from math import radians, sin, cos, sqrt, atan2
+    R = 6371
+    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def legacy_normalize_score(value, min_val, max_val):
+    if max_val == min_val:
+        return 0
+    return 1 - (value - min_val) / (max_val - min_val)
+
+
+def legacy_weighted_score(places_list, user_lat, user_lng, budget, distance_weight=0.5, price_weight=0.5):
+    """原本 jimmyworksheet 的 calculate_weighted_score（逐筆計算）"""
+    if not places_list:
+        return []
+    for place in places_list:
+        lat = place.get('geometry', {}).get('location', {}).get('lat')
+        lng = place.get('geometry', {}).get('location', {}).get('lng')
+        if lat and lng:
+            place['distance_km'] = legacy_calculate_distance(user_lat, user_lng, lat, lng)
+        else:
+            place['distance_km'] = float('inf')
+        price_level = place.get('price_level')
+        try:
+            price_level = int(price_level) if price_level is not None else None
+        except:
+            price_level = None
+        place['price_level_int'] = price_level
+
+    valid_distances = [p['distance_km'] for p in places_list if p['distance_km'] != float('inf')] or [0, 1]
+    valid_prices = [p['price_level_int'] for p in places_list if p['price_level_int'] is not None] or [1, 4]
+    min_distance, max_distance = min(valid_distances), max(valid_distances)
+    min_price, max_price = min(valid_prices), max(valid_prices)
+
+    for place in places_list:
+        distance = place['distance_km']
+        price = place['price_level_int']
+        distance_score = 0 if distance == float('inf') else legacy_normalize_score(distance, min_distance, max_distance)
+        price_score = 0.5 if price is None else legacy_normalize_score(price, min_price, max_price)
+        weighted_score = (distance_score * distance_weight + price_score * price_weight) * 100
+        place['weighted_score'] = round(weighted_score, 2)
+        place['distance_score'] = round(distance_score * 100, 2)
+        place['price_score'] = round(price_score * 100, 2)
+    return sorted(places_list, key=lambda x: x['weighted_score'], reverse=True)
+
+
+def make_places(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(21.9, 25.3, n)
+    lngs = rng.uniform(120.0, 122.0, n)
+    levels = rng.integers(0, 5, n)
+    places = []
+    for i in range(n):
+        place = {'place_id': f'p{i}', 'name': f'place {i}'}
+        if i % 50:
+            place['geometry'] = {'location': {'lat': float(lats[i]), 'lng': float(lngs[i])}}
+        if i % 7:
+            place['price_level'] = int(levels[i])
+        places.append(place)
+    return places
+
+
+def load_worksheet():
+    """jimmyworksheet 沒有 .py 副檔名，用 SourceFileLoader 載入"""
+    loader = SourceFileLoader('jimmyworksheet', os.path.join(ROOT, 'jimmyworksheet'))
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    return module
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    worksheet = load_worksheet()
+    user_lat, user_lng = 25.0330, 121.5654
+
+    print(f'{"places":>9} {"loop (s)":>9} {"adapter (s)":>12} {"batch (s)":>10} {"speedup":>8}')
+    for n in args.sizes:
+        places = make_places(n)
+        legacy, t_loop = timed(legacy_weighted_score, copy.deepcopy(places), user_lat, user_lng, None)
+        adapted, t_adapter = timed(worksheet.calculate_weighted_score, copy.deepcopy(places), user_lat, user_lng, None)
+
+        location = [p.get('geometry', {}).get('location', {}) for p in places]
+        lats = np.array([loc.get('lat', np.nan) for loc in location])
+        lngs = np.array([loc.get('lng', np.nan) for loc in location])
+        prices = np.array([p.get('price_level', np.nan) for p in places], dtype=np.float64)
+        (scores, order), t_batch = timed(score_places, lats, lngs, prices, user_lat, user_lng)
+
+        assert [p['place_id'] for p in legacy] == [p['place_id'] for p in adapted]
+        assert [p['place_id'] for p in legacy] == [places[i]['place_id'] for i in order]
+        for key in ['weighted_score', 'distance_score', 'price_score']:
+            assert np.allclose([p[key] for p in legacy], [p[key] for p in adapted], atol=0.011)
+        print(f'{n:>9} {t_loop:>9.3f} {t_adapter:>12.3f} {t_batch:>10.4f} {t_loop / t_batch:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+啟動時間比較：CSV 讀取 + 清理 + 合併 vs. 讀取快照 (utils/snapshot.py)。
+
+使用方式（在專案根目錄）：python -m benchmarks.bench_startup [--scale 1 100 1000]
+--scale 會把 Travel_dataset.csv 複製成 N 倍大小，模擬較大的旅遊紀錄。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.snapshot import build_datasets, load_datasets, COUNTRY_INFO_PATH, TRAVEL_PATH  # noqa: E402
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    base = pd.read_csv(TRAVEL_PATH)
+    print(f'{"scale":>6} {"rows":>9} {"csv+clean (ms)":>15} {"snapshot (ms)":>14} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            travel_path = os.path.join(tmp, f'travel_{scale}.csv')
+            pd.concat([base] * scale, ignore_index=True).to_csv(travel_path, index=False)
+            snapshot_dir = os.path.join(tmp, f'snapshot_{scale}')
+            load_datasets(travel_path, COUNTRY_INFO_PATH, snapshot_dir)  # 先建立快照
+
+            t_csv = best_of(lambda: build_datasets(travel_path, COUNTRY_INFO_PATH), args.repeat)
+            t_snap = best_of(lambda: load_datasets(travel_path, COUNTRY_INFO_PATH, snapshot_dir), args.repeat)
+            print(f'{scale:>6} {len(base) * scale:>9} {t_csv * 1000:>15.1f} {t_snap * 1000:>14.1f} {t_csv / t_snap:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+app2 旅遊清單篩選比較：copy + 兩次布林遮罩 vs. (類別, 縣市) 索引 take。
+
+以 data/food.csv 與 data/activity.csv 的實際大小建立旅遊清單，
+對所有下拉選單組合各跑一次，回報每次篩選的平均時間。
+使用方式（在專案根目錄）：python -m benchmarks.bench_travel_filter [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from app2 import ALL, TABLE_COLUMNS, build_travel_lookup
+
+
+def load_travel():
+    """與 app2.load_data() 相同的欄位整理，只用 food.csv 與 activity.csv"""
+    frames = []
+    for name, category in [('food.csv', '食物'), ('activity.csv', '活動')]:
+        df = pd.read_csv(os.path.join(ROOT, 'data', name))
+        df = df.rename(columns={'名稱': 'Name', '地址': 'Add', '電話': 'Tel', '縣市': 'City'})
+        df['Category'] = category
+        if category == '活動':
+            df['Add'] = df['City']
+        frames.append(df[['Name', 'Add', 'Tel', 'City', 'Category']])
+    combined = pd.concat(frames, ignore_index=True).fillna('')
+    combined['id'] = np.arange(len(combined))
+    return combined
+
+
+def filter_mask(travel_df, category, city):
+    df = travel_df.copy()
+    if category != ALL:
+        df = df[df['Category'] == category]
+    if city != ALL:
+        df = df[df['City'] == city]
+    return df[TABLE_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    travel_df = load_travel()
+    t = time.perf_counter()
+    lookup = build_travel_lookup(travel_df)
+    table_df = travel_df[TABLE_COLUMNS]
+    build_ms = (time.perf_counter() - t) * 1000
+
+    combos = [(c, y) for c in [ALL, *travel_df['Category'].unique()] for y in [ALL, *travel_df['City'].unique()]]
+    empty = np.array([], dtype=np.intp)
+    print(f'rows: {len(travel_df)}, combinations: {len(combos)}, index build: {build_ms:.1f} ms')
+
+    for combo in combos:
+        expected = filter_mask(travel_df, *combo)
+        assert expected.equals(table_df.take(lookup.get(combo, empty)))
+
+    print(f'{"method":>8} {"ms / call":>10}')
+    for label, fn in [
+        ('mask', lambda c, y: filter_mask(travel_df, c, y)),
+        ('index', lambda c, y: table_df.take(lookup.get((c, y), empty))),
+    ]:
+        t = time.perf_counter()
+        for _ in range(args.repeat):
+            for combo in combos:
+                fn(*combo)
+        elapsed = (time.perf_counter() - t) * 1000 / (args.repeat * len(combos))
+        print(f'{label:>8} {elapsed:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
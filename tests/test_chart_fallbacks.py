@@ -0,0 +1,38 @@
+import pandas as pd
+
+from utils.visualization import generate_bar, generate_box, generate_pie
+
+
+def compact_frame():
+    # 類別欄位和 schema.compact_frame 一樣使用共用的 category（包含其他國家才有的值）
+    nationality = pd.CategoricalDtype(['Japanese', 'French', 'Korean', 'Brazilian', 'Kenyan'])
+    age = pd.CategoricalDtype(['<20', '20-29', '30-39', '40+'], ordered=True)
+    return pd.DataFrame({
+        'Continent': pd.Categorical(['East Asia'] * 4 + ['Western Europe'] * 2),
+        'Destination': pd.Categorical(['Japan', 'Japan', 'Japan', 'South Korea', 'France', 'France']),
+        'Traveler nationality': pd.Series(['Korean', 'Japanese', 'Korean', 'Japanese', 'French', 'Brazilian'],
+                                          dtype=nationality),
+        'Age group': pd.Series(['20-29', '20-29', '30-39', '40+', '<20', '20-29'], dtype=age),
+        'Start month': pd.Categorical(['May', 'May', 'July', 'May', 'June', 'June']),
+        'Accommodation cost': [100.0, 200.0, 150.0, 90.0, 300.0, 250.0],
+    })
+
+
+def test_pie_lists_only_observed_unordered_categories():
+    data = generate_pie(compact_frame(), 'Japan', 'Traveler nationality').data[0]
+    assert list(data.labels) == ['Korean', 'Japanese']
+    assert list(data.values) == [2, 1]
+
+
+def test_pie_keeps_empty_bins_for_ordered_categories():
+    data = generate_pie(compact_frame(), 'Japan', 'Age group').data[0]
+    assert list(data.labels) == ['20-29', '30-39', '<20', '40+']
+    assert list(data.values) == [2, 1, 0, 0]
+
+
+def test_bar_and_box_fallbacks_use_only_the_group():
+    bar = generate_bar(compact_frame(), 'Japan').data[0]
+    counts = dict(zip(bar.x, bar.y))
+    assert len(counts) == 12 and counts['May'] == 2 and counts['July'] == 1 and sum(counts.values()) == 3
+    box = generate_box(compact_frame(), 'France', 'Accommodation cost').data[0]
+    assert sorted(box.x) == [250.0, 300.0]
@@ -0,0 +1,183 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils.geocode_batch import geocode_attractions, read_coords, write_coords
+from utils.geocode_cache import GeocodeCache, cached_geocode
+from utils.geocode_executor import (STATUS_ERROR, STATUS_MISS, STATUS_OK, STATUS_PENDING,
+                                    GeocodeExecutor, TokenBucket)
+
+
+class FakeGeocoder:
+    """不連網、thread-safe 的地理編碼器：results 為 查詢字串 → (lat, lng) / 例外；沒有的回傳 None"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls.append(query)
+        result = self.results.get(query)
+        if isinstance(result, Exception):
+            raise result
+        return None if result is None else SimpleNamespace(latitude=result[0], longitude=result[1])
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self.acquired += 1
+
+
+class FakeClock:
+    """假的時鐘：sleep 直接把時間往前推，不真的等待"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_spaces_calls_by_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+    times = []
+    for _ in range(5):
+        bucket.acquire()
+        times.append(clock.now)
+    assert times == pytest.approx([0, 0.5, 1.0, 1.5, 2.0])
+
+
+def test_token_bucket_allows_capacity_burst_then_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=3, clock=clock, sleep=clock.sleep)
+    times = []
+    for _ in range(5):
+        bucket.acquire()
+        times.append(clock.now)
+    assert times == pytest.approx([0, 0, 0, 1, 2])
+    clock.now += 10     # 閒置很久也只累積到 capacity 個
+    for _ in range(4):
+        bucket.acquire()
+        times.append(clock.now)
+    assert times[5:] == pytest.approx([12, 12, 12, 13])
+
+
+def test_token_bucket_caps_rate_across_threads():
+    rate, capacity = 200, 2
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    times, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            bucket.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    times.sort()
+    # 任何長度 T 的區間內最多 capacity + rate × T 次
+    for i in range(len(times)):
+        for j in range(i, len(times)):
+            assert j - i + 1 <= capacity + rate * (times[j] - times[i]) + 1e-6
+
+
+def test_executor_reports_ok_miss_and_error():
+    geocode = FakeGeocoder({'a': (1.0, 2.0), 'c': TimeoutError('slow')})
+    limiter = CountingLimiter()
+    executor = GeocodeExecutor(geocode, limiter=limiter, max_workers=3)
+
+    def fn(item, limited):
+        if item == 'd':
+            raise ValueError('bad row')
+        location = limited(item)
+        return (location.latitude, location.longitude) if location else None
+
+    results = {item: (status, latlng) for item, status, latlng in executor.run(['a', 'b', 'c', 'd'], fn)}
+    assert results == {'a': (STATUS_OK, (1.0, 2.0)), 'b': (STATUS_MISS, None),
+                       'c': (STATUS_ERROR, None), 'd': (STATUS_ERROR, None)}
+    assert limiter.acquired == 3
+
+
+def test_executor_marks_swallowed_geocode_errors_as_error(tmp_path):
+    # cached_geocode 會吞掉例外回傳 None，仍要記成 error 而不是 miss
+    cache = GeocodeCache(path=str(tmp_path / 'geocode.sqlite'))
+    geocode = FakeGeocoder({'x': TimeoutError('slow')})
+    executor = GeocodeExecutor(geocode)
+    [(_, status, latlng)] = executor.run(['x'], lambda item, limited: cached_geocode(cache, limited, item))
+    assert (status, latlng) == (STATUS_ERROR, None)
+
+
+def attractions():
+    return pd.DataFrame({
+        'country': ['France', 'France', 'Japan', 'Japan'],
+        'attraction': ['Louvre', 'Eiffel Tower', 'Nowhere', 'Shrine'],
+        'address': ['Rue de Rivoli', None, 'Unknown St', 'Shrine Rd'],
+        'city': ['Paris', 'Paris', 'Tokyo', 'Kyoto'],
+    })
+
+
+RESULTS = {
+    'Rue de Rivoli, Paris, France': (48.86, 2.34),
+    'Eiffel Tower, Paris, France': (48.86, 2.29),        # 沒有地址 → 直接用名稱查
+    'Shrine Rd, Kyoto, Japan': TimeoutError('slow'),
+    'Shrine, Kyoto, Japan': TimeoutError('slow'),
+}
+
+
+def statuses(coords):
+    return dict(zip(coords['attraction'], coords['status']))
+
+
+def test_geocode_attractions_records_statuses_and_resumes(tmp_path):
+    cache = GeocodeCache(path=str(tmp_path / 'geocode.sqlite'))
+    coords_path = str(tmp_path / 'coords.parquet')
+    progress = []
+    geocode = FakeGeocoder(dict(RESULTS))
+    coords = geocode_attractions(attractions(), cache, geocode, coords_path=coords_path, batch_size=3,
+                                 max_workers=3, on_progress=lambda n, total: progress.append((n, total)))
+
+    assert statuses(coords) == {'Louvre': STATUS_OK, 'Eiffel Tower': STATUS_OK,
+                                'Nowhere': STATUS_MISS, 'Shrine': STATUS_ERROR}
+    assert statuses(read_coords(coords_path)) == statuses(coords)
+    assert progress == [(3, 4), (4, 4)]
+    assert coords.set_index('attraction').loc['Louvre', ['lat', 'lng']].tolist() == [48.86, 2.34]
+
+    # 重跑：只處理 error、pending 與名稱地址改過的列
+    coords = read_coords(coords_path)
+    coords.loc[coords['attraction'] == 'Eiffel Tower', 'status'] = STATUS_PENDING   # 模擬中斷
+    write_coords(coords, coords_path)
+    df = attractions()
+    df.loc[df['attraction'] == 'Louvre', 'city'] = 'Paris 1er'
+    geocode = FakeGeocoder(dict(RESULTS, **{'Shrine Rd, Kyoto, Japan': (35.0, 135.7),
+                                            'Rue de Rivoli, Paris 1er, France': (48.861, 2.335)}))
+    limiter = CountingLimiter()
+    coords = geocode_attractions(df, cache, geocode, coords_path=coords_path, limiter=limiter)
+
+    # Eiffel Tower 的座標已在快取中，不會再呼叫 geocode、也不取 token
+    assert sorted(geocode.calls) == ['Rue de Rivoli, Paris 1er, France', 'Shrine Rd, Kyoto, Japan']
+    assert limiter.acquired == 2
+    assert set(statuses(coords).values()) == {STATUS_OK, STATUS_MISS}
+    assert coords.set_index('attraction').loc['Shrine', ['lat', 'lng']].tolist() == [35.0, 135.7]
+
+    # 全部完成後再跑一次不做任何事
+    geocode = FakeGeocoder({})
+    geocode_attractions(df, cache, geocode, coords_path=coords_path)
+    assert geocode.calls == []
@@ -0,0 +1,85 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.geocode_cache import GeocodeCache, cached_geocode, make_nominatim_geocoder
+
+
+class StubGeocoder:
+    """不連網的地理編碼器：results 為 名稱 → (lat, lng) / None / 例外"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def __call__(self, query):
+        self.calls.append(query)
+        result = self.results.get(query)
+        if isinstance(result, Exception):
+            raise result
+        return None if result is None else SimpleNamespace(latitude=result[0], longitude=result[1])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GeocodeCache(path=str(tmp_path / 'geocode.sqlite'))
+
+
+def test_hit_is_served_from_cache(cache):
+    geocode = StubGeocoder({'Louvre': (48.86, 2.34)})
+    assert cached_geocode(cache, geocode, 'Louvre', ' Rue  de Rivoli ') == (48.86, 2.34)
+    assert cached_geocode(cache, geocode, 'louvre', 'rue de rivoli') == (48.86, 2.34)
+    assert geocode.calls == ['Louvre']
+    assert cache.get('louvre|rue de rivoli') == (True, (48.86, 2.34))
+
+
+def test_not_found_is_cached_as_negative_entry(cache):
+    geocode = StubGeocoder({})
+    assert cached_geocode(cache, geocode, 'Nowhere') is None
+    assert cached_geocode(cache, geocode, 'Nowhere') is None
+    assert geocode.calls == ['Nowhere']
+    assert cache.get('nowhere') == (True, None)
+
+
+def test_entries_expire_after_their_ttl(cache, monkeypatch):
+    geocode = StubGeocoder({'Louvre': (48.86, 2.34)})
+    cached_geocode(cache, geocode, 'Louvre')
+    cached_geocode(cache, geocode, 'Nowhere')
+    now = time.time()
+
+    monkeypatch.setattr(time, 'time', lambda: now + cache.negative_ttl + 1)
+    assert cache.get('nowhere') == (False, None)
+    assert cache.get('louvre') == (True, (48.86, 2.34))
+
+    monkeypatch.setattr(time, 'time', lambda: now + cache.ttl + 1)
+    assert cache.get('louvre') == (False, None)
+    cached_geocode(cache, geocode, 'Louvre')
+    assert geocode.calls == ['Louvre', 'Nowhere', 'Louvre']
+
+
+def test_exceptions_are_not_cached(cache):
+    geocode = StubGeocoder({'Louvre': TimeoutError('slow')})
+    assert cached_geocode(cache, geocode, 'Louvre', 'rue') is None
+    assert cache.get('louvre|rue') == (False, None)
+
+    geocode.results['Louvre'] = (48.86, 2.34)
+    assert cached_geocode(cache, geocode, 'Louvre', 'rue') == (48.86, 2.34)
+
+
+@pytest.mark.parametrize('min_delay_seconds', [0, 1])
+def test_nominatim_outage_is_not_cached(cache, monkeypatch, min_delay_seconds):
+    from geopy.exc import GeocoderUnavailable
+    from geopy.geocoders import Nominatim
+
+    calls = []
+
+    def unavailable(self, query, *args, **kwargs):
+        calls.append(query)
+        raise GeocoderUnavailable('down')
+
+    monkeypatch.setattr(Nominatim, 'geocode', unavailable)
+    geocode = make_nominatim_geocoder(min_delay_seconds=min_delay_seconds)
+    assert cached_geocode(cache, geocode, 'Louvre', 'rue') is None
+    assert cache.get('louvre|rue') == (False, None)
+    assert calls == ['Louvre']   # RateLimiter 不重試
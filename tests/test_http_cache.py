@@ -0,0 +1,77 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from utils.http_client import PAGE_TOKEN_TTL, GoogleMapsClient, TTLCache
+
+
+def sqlite_keys(path):
+    with closing(sqlite3.connect(path)) as conn:
+        return sorted(row[0] for row in conn.execute('SELECT key FROM responses'))
+
+
+def test_sqlite_keeps_only_max_entries(tmp_path):
+    path = str(tmp_path / 'http.sqlite')
+    cache = TTLCache(maxsize=2, path=path, max_entries=3)
+    for i in range(6):
+        cache.set(f'k{i}', {'i': i})
+        time.sleep(0.001)
+    assert sqlite_keys(path) == ['k3', 'k4', 'k5']
+    # 記憶體沒有、檔案有 → 仍可命中
+    assert TTLCache(path=path).get('k3') == (True, {'i': 3})
+    assert TTLCache(path=path).get('k0') == (False, None)
+
+
+def test_expired_rows_are_removed_on_set(tmp_path):
+    path = str(tmp_path / 'http.sqlite')
+    cache = TTLCache(path=path)
+    cache.set('short', 1, ttl=-1)
+    cache.set('long', 2)
+    assert sqlite_keys(path) == ['long']
+    assert cache.get('short') == (False, None)
+    assert cache.get('long') == (True, 2)
+
+
+def test_migrates_cache_file_without_expires_at(tmp_path):
+    path = str(tmp_path / 'http.sqlite')
+    now = time.time()
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute('CREATE TABLE responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)')
+        conn.executemany('INSERT INTO responses VALUES (?, ?, ?)', [('fresh', '1', now), ('stale', '2', now - 200)])
+    cache = TTLCache(ttl=100, path=path)
+    assert cache.get('fresh') == (True, 1)
+    assert cache.get('stale') == (False, None)
+
+
+class StubResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class StubSession:
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return StubResponse(self.data)
+
+
+def test_page_token_responses_get_short_ttl(monkeypatch):
+    cache = TTLCache()
+    ttls = []
+    original_set = cache.set
+    monkeypatch.setattr(cache, 'set', lambda key, value, ttl=None: (ttls.append(ttl), original_set(key, value, ttl)))
+
+    client = GoogleMapsClient(session=StubSession({'status': 'OK', 'results': [], 'next_page_token': 't'}), cache=cache)
+    client.nearby_search(25.0, 121.5, 'key', place_type='cafe')
+    client = GoogleMapsClient(session=StubSession({'status': 'OK', 'results': []}), cache=cache)
+    client.nearby_search(25.0, 121.5, 'key', place_type='bar')
+    assert ttls == [PAGE_TOKEN_TTL, None]
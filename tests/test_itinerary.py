@@ -0,0 +1,101 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.itinerary import (MIN_VALUE, NEUTRAL_VALUE, candidate_values, fill_budget, knapsack_dp,
+                             knapsack_greedy, solve_budget, wishlist_candidates)
+
+
+def brute_force(costs, values, budget):
+    """列舉所有組合的最佳總價值"""
+    best = 0.0
+    for r in range(1, len(costs) + 1):
+        for combo in combinations(range(len(costs)), r):
+            combo = list(combo)
+            if costs[combo].sum() <= budget:
+                best = max(best, values[combo].sum())
+    return best
+
+
+def random_case(rng):
+    n = int(rng.integers(1, 13))
+    costs = rng.integers(0, 500, n).astype(float)
+    values = rng.uniform(0, 100, n)
+    budget = float(rng.integers(0, 1500))
+    return costs, values, budget
+
+
+def test_dp_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        costs, values, budget = random_case(rng)
+        picked = knapsack_dp(costs, values, budget)
+        assert costs[picked].sum() <= budget
+        assert values[picked].sum() == pytest.approx(brute_force(costs, values, budget))
+
+
+def test_coarse_grid_and_greedy_stay_within_budget():
+    rng = np.random.default_rng(1)
+    worst = 1.0
+    for _ in range(300):
+        costs, values, budget = random_case(rng)
+        best = brute_force(costs, values, budget)
+        for picked in (knapsack_dp(costs, values, budget, max_cells=50), knapsack_greedy(costs, values, budget),
+                       solve_budget(costs, values, budget, max_cells=50)):
+            assert costs[picked].sum() <= budget
+            assert len(set(picked.tolist())) == len(picked)
+        if best > 0:
+            worst = min(worst, values[knapsack_greedy(costs, values, budget)].sum() / best)
+    assert worst >= 0.5    # 貪婪法 + 最佳單一項目：至少最佳解的一半
+
+
+def test_fill_budget_solves_each_type_within_its_budget():
+    df = pd.DataFrame({'type': ['食', '食', '食', '住', '住', '景'],
+                       'price': [300, 200, 200, 3000, 2500, 0],
+                       'weighted_score': [90, 60, 55, 80, 70, 10]})
+    result = fill_budget(df, {'食': 400, '住': 2800, '景': 0, '活': 100})
+    assert result['selected'].tolist() == [1, 2, 4, 5]
+    assert result['spent'] == {'食': 400.0, '住': 2500.0, '景': 0.0, '活': 0.0}
+
+
+def test_candidate_values_without_metrics_fall_back_to_price():
+    df = pd.DataFrame({'type': ['食', '食'], 'price': [0, 250]})
+    assert candidate_values(df).tolist() == [MIN_VALUE, 250.0]
+
+
+def test_wishlist_candidates_look_up_poi_rows():
+    poi = pd.DataFrame({'Name': ['a', 'b', 'c', 'd'],
+                        'Lat': [25.03, 25.04, 24.15, np.nan], 'Lng': [121.56, 121.57, 120.67, np.nan]})
+    wishlist = [
+        {'name': 'a', 'type': '景', 'price': 0, 'poi_id': 0},
+        {'name': 'b', 'type': '景', 'price': 0, 'poi_id': 1},
+        {'name': 'c', 'type': '景', 'price': 0, 'poi_id': 2},
+        {'name': 'd', 'type': '景', 'price': 0, 'poi_id': 3},    # 沒有座標
+        {'name': '手動', 'type': '食', 'price': 120},             # 沒有 poi_id（舊資料或空白列）
+        {'name': 'x', 'type': '食', 'price': 50, 'poi_id': 99},  # 超出範圍
+    ]
+    df = wishlist_candidates(wishlist, poi)
+    assert df['type'].tolist() == ['景', '景', '景', '景', '食', '食']
+    assert np.isnan(df['distance_km'].to_numpy()[3:]).all()
+    # 台中那一個離其他地點最遠
+    assert df['distance_km'].to_numpy()[2] > 100 > df['distance_km'].to_numpy()[0]
+
+    values = candidate_values(df)
+    assert values[0] > values[2] >= MIN_VALUE
+    assert values[3:].tolist() == [NEUTRAL_VALUE] * 3
+
+
+def test_fresh_wishlist_gets_suggestions():
+    # 從旅遊清單加入、價格仍是 0 的列：每一項都有價值，預算為 0 也全部建議
+    poi = pd.DataFrame({'Lat': [25.03, 25.04, 24.15], 'Lng': [121.56, 121.57, 120.67]})
+    wishlist = [{'name': n, 'type': t, 'price': 0, 'poi_id': i}
+                for i, (n, t) in enumerate([('a', '景'), ('b', '食'), ('c', '景')])]
+    result = fill_budget(wishlist_candidates(wishlist, poi), {'食': 0, '活': 0, '住': 0, '景': 0})
+    assert result['selected'].tolist() == [0, 1, 2]
+
+    # 有價格時，同類型預算只夠一項 → 選離其他地點近的
+    wishlist[0]['price'] = wishlist[2]['price'] = 500
+    result = fill_budget(wishlist_candidates(wishlist, poi), {'食': 0, '活': 0, '住': 0, '景': 600})
+    assert result['selected'].tolist() == [0, 1]
@@ -0,0 +1,106 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils.http_client import GoogleMapsClient, TTLCache, make_session
+from utils.place_search import search_nearby
+
+PLACE_TYPES = ['restaurant', 'cafe', 'bar']
+# 每個類型的頁面（place_id 清單）；'shared' 同時出現在 restaurant 與 cafe
+PAGES = {
+    'restaurant': [['r1', 'r2', 'shared'], ['r3']],
+    'cafe': [['shared', 'c1']],
+    'bar': [['b1'], ['b2', 'r1'], ['b3']],
+}
+
+
+class StubPlaces:
+    """本機的 Nearby Search 假伺服器：每個 next_page_token 第一次使用時回 INVALID_REQUEST（尚未生效）"""
+
+    def __init__(self):
+        self.requests = []
+        self.token_attempts = {}
+        self.lock = threading.Lock()
+
+    def respond(self, params):
+        with self.lock:
+            self.requests.append(params)
+            token = params.get('pagetoken')
+            if token:
+                attempts = self.token_attempts[token] = self.token_attempts.get(token, 0) + 1
+                if attempts == 1:
+                    return {'status': 'INVALID_REQUEST', 'results': []}
+                place_type, page = token.split(':')
+                page = int(page)
+            else:
+                place_type, page = params['type'], 0
+        pages = PAGES[place_type]
+        body = {'status': 'OK', 'results': [{'place_id': pid, 'name': pid} for pid in pages[page]]}
+        if page + 1 < len(pages):
+            body['next_page_token'] = f'{place_type}:{page + 1}'
+        return body
+
+
+@pytest.fixture
+def stub_server():
+    stub = StubPlaces()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = json.dumps(stub.respond(params)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield stub, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(base_url):
+    return GoogleMapsClient(session=make_session(retries=0), cache=TTLCache(), base_url=base_url)
+
+
+def test_fans_out_per_type_and_follows_pages(stub_server):
+    stub, base_url = stub_server
+    places = search_nearby(make_client(base_url), 25.03, 121.56, 'key', place_types=PLACE_TYPES, page_delay=0.01)
+
+    first_pages = sorted(r['type'] for r in stub.requests if 'type' in r)
+    assert first_pages == sorted(PLACE_TYPES)
+    # 每個 token 第一次回 INVALID_REQUEST，重試一次後成功
+    assert stub.token_attempts == {'restaurant:1': 2, 'bar:1': 2, 'bar:2': 2}
+
+    # 依 place_types、頁碼的順序合併，place_id 只出現一次
+    assert [p['place_id'] for p in places] == ['r1', 'r2', 'shared', 'r3', 'c1', 'b1', 'b2', 'b3']
+
+
+def test_gives_up_after_token_retries(stub_server):
+    stub, base_url = stub_server
+    places = search_nearby(make_client(base_url), 25.03, 121.56, 'key', place_types=['bar'],
+                           page_delay=0.01, token_retries=0)
+    # 不重試：第二頁只試一次就放棄，只剩第一頁
+    assert [p['place_id'] for p in places] == ['b1']
+    assert stub.token_attempts == {'bar:1': 1}
+
+
+def test_repeated_search_is_served_from_cache(stub_server):
+    stub, base_url = stub_server
+    client = make_client(base_url)
+    first = search_nearby(client, 25.03, 121.56, 'key', place_types=PLACE_TYPES, page_delay=0.01)
+    n_requests = len(stub.requests)
+    second = search_nearby(client, 25.03, 121.56, 'key', place_types=PLACE_TYPES, page_delay=0.01)
+    assert second == first
+    assert len(stub.requests) == n_requests
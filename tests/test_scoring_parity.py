@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_transform import adjust_costs_with_cpi, compute_scores
+from utils.data_validation import minmax
+
+WEIGHTS = [None, 0, 0.3, 1, 5]
+
+
+# ===== 向量化之前的實作（凍結版本，只給測試比對用） =====
+def legacy_adjust_costs_with_cpi(out_df):
+    out = out_df.copy()
+    cpi_median = out['CPI'].dropna().median() if 'CPI' in out.columns else np.nan
+
+    def adjust_cost(row):
+        base = row['median_daily_acc_cost']
+        cpi  = row['CPI'] if 'CPI' in row and pd.notna(row['CPI']) else np.nan
+        if pd.notna(base) and pd.notna(cpi) and pd.notna(cpi_median) and cpi_median > 0:
+            return base * (cpi / cpi_median)
+        return base
+
+    out['adj_daily_acc_cost'] = out.apply(adjust_cost, axis=1)
+    return out
+
+
+def legacy_compute_scores(out, w_safety, w_cost):
+    out = out.copy()
+    for col in ['CPI', 'PCE', 'Safety Index']:
+        if col in out.columns:
+            out[col] = pd.to_numeric(out[col], errors='coerce')
+
+    out = legacy_adjust_costs_with_cpi(out)
+
+    s_safety  = minmax(out['Safety Index']) if 'Safety Index' in out.columns else None
+    s_cost_raw = minmax(out['adj_daily_acc_cost'])
+    s_cost = 1 - s_cost_raw if s_cost_raw is not None else None
+
+    ws = (w_safety or 0)
+    wc = (w_cost or 0)
+    denom = (ws + wc) or 1
+    ws, wc = ws / denom, wc / denom
+
+    scores = []
+    for i in range(len(out)):
+        parts, wts = [], []
+        if s_safety is not None and pd.notna(s_safety.iloc[i]):
+            parts.append(s_safety.iloc[i]); wts.append(ws)
+        if s_cost is not None and pd.notna(s_cost.iloc[i]):
+            parts.append(s_cost.iloc[i]);   wts.append(wc)
+
+        if len(parts) == 0 or sum(wts) == 0:
+            scores.append(np.nan)
+        else:
+            norm = sum(wts)
+            wts = [w / norm for w in wts]
+            scores.append(100 * sum(p * w for p, w in zip(parts, wts)))
+    out['Score'] = scores
+    return out
+
+
+# ===== 測試資料 =====
+def random_frame(rng, n, nan_rate=0.2, constant=(), drop=()):
+    df = pd.DataFrame({
+        'Destination': [f'C{i}' for i in range(n)],
+        'Safety Index': rng.uniform(20, 90, n).round(1),
+        'CPI': rng.uniform(50, 150, n).round(1),
+        'median_daily_acc_cost': rng.uniform(10, 500, n).round(2),
+    })
+    for col in ['Safety Index', 'CPI', 'median_daily_acc_cost']:
+        df.loc[rng.random(n) < nan_rate, col] = np.nan
+    for col in constant:
+        df[col] = 42.0
+    return df.drop(columns=list(drop))
+
+
+def assert_same(df, w_safety, w_cost):
+    expected = legacy_compute_scores(df, w_safety, w_cost)
+    actual = compute_scores(df, w_safety, w_cost)
+    for col in ['adj_daily_acc_cost', 'Score']:
+        np.testing.assert_allclose(actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=col)
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_random_frames(seed):
+    rng = np.random.default_rng(seed)
+    df = random_frame(rng, int(rng.integers(1, 40)), nan_rate=rng.choice([0, 0.2, 0.6]))
+    assert_same(df, rng.choice(WEIGHTS), rng.choice(WEIGHTS))
+
+
+@pytest.mark.parametrize('w_safety', WEIGHTS)
+@pytest.mark.parametrize('w_cost', WEIGHTS)
+def test_weights(w_safety, w_cost):
+    assert_same(random_frame(np.random.default_rng(0), 25), w_safety, w_cost)
+
+
+@pytest.mark.parametrize('constant', [['Safety Index'], ['median_daily_acc_cost'], ['CPI'],
+                                      ['Safety Index', 'median_daily_acc_cost']])
+def test_constant_columns(constant):
+    assert_same(random_frame(np.random.default_rng(1), 20, constant=constant), 0.6, 0.4)
+
+
+@pytest.mark.parametrize('drop', [['Safety Index'], ['CPI'], ['Safety Index', 'CPI']])
+def test_missing_columns(drop):
+    assert_same(random_frame(np.random.default_rng(2), 20, drop=drop), 0.5, 0.5)
+
+
+@pytest.mark.parametrize('col', ['Safety Index', 'CPI', 'median_daily_acc_cost'])
+def test_all_nan_column(col):
+    df = random_frame(np.random.default_rng(3), 15)
+    df[col] = np.nan
+    assert_same(df, 0.7, 0.3)
+
+
+def test_string_and_nonpositive_cpi():
+    df = random_frame(np.random.default_rng(4), 10, nan_rate=0)
+    df['Safety Index'] = df['Safety Index'].astype(str)
+    df.loc[2, 'Safety Index'] = 'n/a'
+    assert_same(df, 1, 1)
+    df['CPI'] = 0.0
+    assert_same(df, 1, 1)
+
+
+def test_adjust_costs_with_cpi_parity():
+    df = random_frame(np.random.default_rng(5), 30)
+    np.testing.assert_allclose(adjust_costs_with_cpi(df)['adj_daily_acc_cost'].to_numpy(dtype=float),
+                               legacy_adjust_costs_with_cpi(df)['adj_daily_acc_cost'].to_numpy(dtype=float),
+                               equal_nan=True)
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import dash_leaflet as dl
+from dash.dash_table.Format import Format, Group
+
+from .geocode_batch import DEFAULT_COORDS_PATH, attach_coords, read_coords
+
+DEFAULT_ATTRACTIONS_PATH = './data/Attractions.csv'
+NUMERIC_COLUMNS = ['score', 'ticket', 'ticket_price']
+
+
+def parse_ticket_price(values):
+    """'1,759' → 1759.0；空值或無法解析為 NaN"""
+    text = pd.Series(values, dtype='string').str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(text, errors='coerce').astype(float)
+
+
+def data_version(paths):
+    """景點 CSV 與座標檔的內容雜湊；不存在的檔案以空內容計算"""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode())
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def attraction_marker(point):
+    # 地圖上的小釘子，滑鼠移過去會顯示名稱
+    return dl.Marker(position=[point['lat'], point['lng']], children=dl.Tooltip(point['name']))
+
+
+def points_bounds(points):
+    """所有點的範圍（最南西角 ~ 最北東角）；沒有點時回傳 None"""
+    if not points:
+        return None
+    lats = np.array([p['lat'] for p in points]); lngs = np.array([p['lng'] for p in points])
+    return [[float(lats.min()), float(lngs.min())], [float(lats.max()), float(lngs.max())]]
+
+
+def table_columns(df):
+    """DataTable 欄位設定：數值欄位照數字排序，票價顯示千分位"""
+    columns = []
+    for col in df.columns:
+        spec = {'name': col, 'id': col}
+        if col in NUMERIC_COLUMNS:
+            spec['type'] = 'numeric'
+        if col == 'ticket_price':
+            spec['format'] = Format(group=Group.yes).to_plotly_json()
+        columns.append(spec)
+    return columns
+
+
+def build_country(df, coords):
+    """
+    單一國家的預先計算結果：
+        - records：DataTable 的資料（NaN 轉成 None、票價已是數字）
+        - points / markers：座標檔中有座標的景點與對應的 dl.Marker
+        - bounds：points 的範圍
+        - unresolved：座標檔還沒處理過的景點 [名稱, 地址]，查詢時再看快取或交給背景工作定位
+    """
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    names = df['attraction'].astype(str).to_numpy(dtype=object)
+    has_coords = (coords['geocoded'] & coords['lat'].notna() & coords['lng'].notna()).to_numpy()
+    points = [{'name': n, 'lat': float(lat), 'lng': float(lng)} for n, lat, lng in
+              zip(names[has_coords], coords['lat'].to_numpy()[has_coords], coords['lng'].to_numpy()[has_coords])]
+    addresses = df['address'].astype(object).where(df['address'].notna(), None)
+    unresolved = [[n, addr] for n, addr, done in zip(names, addresses, coords['geocoded'].to_numpy()) if not done]
+    return {
+        'records': records,
+        'points': points,
+        'markers': [attraction_marker(p) for p in points],
+        'bounds': points_bounds(points),
+        'unresolved': unresolved,
+    }
+
+
+class AttractionIndex:
+    """
+    Attractions 頁的每國預先計算結果 (Per-country artifact cache)。
+
+    啟動時讀取景點 CSV 與座標檔，依國家建好表格資料、地圖標記與範圍，切換國家時直接回傳；
+    每次取用前比對兩個檔案的修改時間，內容雜湊（data version）改變時才重建。
+    """
+
+    def __init__(self, attractions_path=DEFAULT_ATTRACTIONS_PATH, coords_path=DEFAULT_COORDS_PATH):
+        self.paths = [attractions_path, coords_path]
+        self.version = None
+        self.countries = []
+        self.columns = []
+        self._by_country = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _file_stamp(self):
+        return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) if os.path.exists(p) else None
+                     for p in self.paths)
+
+    def refresh(self):
+        """檔案有變動且內容雜湊不同時重建；有重建回傳 True"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            version = data_version(self.paths)
+            rebuilt = version != self.version
+            if rebuilt:
+                self._build()
+                self.version = version
+            self._stamp = stamp
+            return rebuilt
+
+    def _build(self):
+        attractions_path, coords_path = self.paths
+        df = pd.read_csv(attractions_path)
+        df['ticket_price'] = parse_ticket_price(df['ticket_price'])
+        coords = attach_coords(df, read_coords(coords_path))
+
+        self.countries = list(df['country'].unique())
+        self.columns = table_columns(df)
+        self._by_country = {country: build_country(df.loc[idx], coords.loc[idx])
+                            for country, idx in df.groupby('country', sort=False).groups.items()}
+
+    def get(self, country):
+        """國家的預先計算結果（見 build_country）；沒有這個國家時回傳 None"""
+        self.refresh()
+        return self._by_country.get(country)
@@ -2,6 +2,40 @@ import pandas as pd
 
 ALERT_RANK_MAP = {'灰色': 2, '黃色': 3, '橙色': 4}
 ALL_COMPARE_METRICS = ['safety', 'cpi', 'pce', 'accommodation', 'transportation', 'travelers']
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+# Overview 頁面下拉選單的欄位 / 指標選項
+PIE_FIELDS = ['Traveler nationality', 'Age group', 'Traveler gender', 'Accommodation type', 'Transportation type']
+MAP_METRICS = ['Safety Index', 'Crime_index', 'CPI', 'PCE', 'Exchange_rate']
+BOX_METRICS = ['Accommodation cost', 'Transportation cost']
+# 國家名稱 → ISO 國碼（地圖用）
+# 刻意不列 Scotland：plotly 的 locations 只認 ISO-3 國碼，畫不出 GB-SCT 這種次級行政區；
+# 對應到 GBR 又會和 UK 搶同一個位置。沒有國碼的國家由 geo_index.country_table 略過。
+COUNTRY_ISO_MAP = {
+    'USA': 'USA',
+    'UK': 'GBR',
+    'France': 'FRA',
+    'Canada': 'CAN',
+    'Germany': 'DEU',
+    'Japan': 'JPN',
+    'Australia': 'AUS',
+    'Italy': 'ITA',
+    'Spain': 'ESP',
+    'Mexico': 'MEX',
+    'New Zealand': 'NZL',
+    'South Korea': 'KOR',
+    'United Arab Emirates': 'ARE',
+    'Netherlands': 'NLD',
+    'South Africa': 'ZAF',
+    'Thailand': 'THA',
+    'Egypt': 'EGY',
+    'Brazil': 'BRA',
+    'Morocco': 'MAR',
+    'Indonesia': 'IDN',
+    'Greek': 'GRC',
+    'Greece': 'GRC',
+    'Cambodia': 'KHM',
+}
 TAB_STYLE = {
     'idle': {
         'borderRadius': '10px','padding': '0px','marginInline': '5px','display':'flex',
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from .const import MONTH_ORDER, PIE_FIELDS
+
+
+class CountCube:
+    """
+    Overview 長條圖 / 圓餅圖用的預先彙總次數表 (Pre-aggregated count cube)。
+
+    載入資料時由 GeoIndex 建立一次：
+        - 洲或國家 × 出發月份 (12 個月) 的次數
+        - 洲或國家 × 各圓餅圖欄位類別 的次數，以及每個類別在該組第一次出現的位置
+    全部存成 int32 陣列，圖表只需要查表，不必再對原始行程做 value_counts。
+    """
+
+    def __init__(self, geo_index, fields=PIE_FIELDS):
+        df = geo_index.df
+        self.geo_rows = {geo: i for i, geo in enumerate(geo_index.by_geo)}
+        n_geo = len(self.geo_rows)
+
+        month_codes = pd.Categorical(df['Start month'], categories=MONTH_ORDER).codes
+        self.month_counts = np.zeros((n_geo, len(MONTH_ORDER)), dtype=np.int32)
+        for geo, row in self.geo_rows.items():
+            codes = month_codes[geo_index.positions(geo)]
+            self.month_counts[row] = np.bincount(codes[codes >= 0], minlength=len(MONTH_ORDER))
+
+        self.categories = {}
+        self.counts = {}
+        self.first_seen = {}
+        self.include_empty = {}
+        for field in fields:
+            col = df[field]
+            if isinstance(col.dtype, pd.CategoricalDtype) and col.dtype.ordered:
+                # 有序類別（例如年齡區間）：和 value_counts 一樣列出所有類別，包含 0 次的
+                codes, categories = col.cat.codes.to_numpy(), col.cat.categories
+                self.include_empty[field] = True
+            else:
+                codes, categories = pd.factorize(col)
+                self.include_empty[field] = False
+            n_cat = len(categories)
+            counts = np.zeros((n_geo, n_cat), dtype=np.int32)
+            first = np.full((n_geo, n_cat), np.iinfo(np.int32).max, dtype=np.int32)
+            for geo, row in self.geo_rows.items():
+                group_codes = codes[geo_index.positions(geo)]
+                group_codes = group_codes[group_codes >= 0]
+                counts[row] = np.bincount(group_codes, minlength=n_cat)
+                seen, first_idx = np.unique(group_codes, return_index=True)
+                first[row, seen] = first_idx
+            self.categories[field] = np.asarray(categories, dtype=object)
+            self.counts[field] = counts
+            self.first_seen[field] = first
+
+    def month_table(self, geo):
+        """各月份次數，依 MONTH_ORDER 排列；找不到的洲或國家全部為 0"""
+        row = self.geo_rows.get(geo)
+        if row is None:
+            return np.zeros(len(MONTH_ORDER), dtype=np.int64)
+        return self.month_counts[row].astype(np.int64)
+
+    def field_table(self, geo, field):
+        """
+        回傳 (類別, 次數)，順序與 value_counts() 相同：
+        次數由大到小，同次數時依該組第一次出現的順序（有序類別則依類別順序）。
+        """
+        row = self.geo_rows.get(geo)
+        categories = self.categories[field]
+        if row is None:
+            counts = np.zeros(len(categories), dtype=np.int64)
+            tie = np.arange(len(categories))
+        else:
+            counts = self.counts[field][row].astype(np.int64)
+            tie = np.arange(len(categories)) if self.include_empty[field] else self.first_seen[field][row]
+        keep = np.ones(len(categories), dtype=bool) if self.include_empty[field] else counts > 0
+        order = np.lexsort((tie[keep], -counts[keep]))
+        return categories[keep][order], counts[keep][order]
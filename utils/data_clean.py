@@ -1,4 +1,18 @@
 import pandas as pd
+from pandas.api.types import union_categoricals
+from .const import MONTH_ORDER
+
+# 串流讀取時各欄位的型別：文字欄位直接讀成 category；花費與日期也先讀成 category，
+# 之後只需解析「不重複的值」再依代碼展開
+TRAVEL_READ_DTYPES = {
+    'Trip ID': 'float64', 'Destination': 'category', 'Start date': 'category', 'End date': 'category',
+    'Duration (days)': 'float32', 'Traveler name': 'category', 'Traveler age': 'float32',
+    'Traveler gender': 'category', 'Traveler nationality': 'category', 'Accommodation type': 'category',
+    'Accommodation cost': 'category', 'Transportation type': 'category', 'Transportation cost': 'category',
+}
+TRAVEL_CATEGORY_COLUMNS = ['Destination', 'Traveler name', 'Traveler gender', 'Traveler nationality',
+                           'Accommodation type', 'Transportation type']
+TRAVEL_DATE_FORMAT = '%m/%d/%Y'
 
 def travel_data_clean(travel_df):
     # 去除空值    
@@ -40,6 +54,70 @@ def travel_data_clean(travel_df):
 
     return travel_df
 
+def _parse_categorical(col, parser):
+    # 只解析不重複的類別，再用代碼展開回每一列（已 dropna，不會有 -1 代碼）
+    parsed = parser(pd.Series(col.cat.categories))
+    return pd.Series(parsed.to_numpy()[col.cat.codes.to_numpy()], index=col.index)
+
+def _parse_cost(values):
+    return pd.to_numeric(values.str.replace(r'[$,]| USD', '', regex=True)).astype('float32')
+
+def _parse_date(values):
+    return pd.to_datetime(values, format=TRAVEL_DATE_FORMAT)
+
+def _clean_travel_chunk(chunk):
+    # 去除空值
+    chunk = chunk.dropna()
+    chunk['Trip ID'] = chunk['Trip ID'].astype('int64')
+
+    # 花費欄位：一次用正規表示式去掉 $ , USD，直接轉成 float32
+    for col in ['Accommodation cost', 'Transportation cost']:
+        chunk[col] = _parse_categorical(chunk[col], _parse_cost)
+
+    # 日期欄位使用固定格式解析
+    for col in ['Start date', 'End date']:
+        chunk[col] = _parse_categorical(chunk[col], _parse_date)
+
+    # 新增總花費欄位
+    chunk['Total cost'] = chunk['Accommodation cost'] + chunk['Transportation cost']
+
+    # 依照旅遊開始日期劃分月份（英文月份，category）
+    chunk['Start month'] = pd.Categorical.from_codes(chunk['Start date'].dt.month.to_numpy() - 1, categories=MONTH_ORDER)
+    return chunk
+
+def travel_data_clean_chunked(path, chunksize=100_000):
+    """
+    串流版的 travel_data_clean：分批讀取 CSV 並清理，欄位與 travel_data_clean 相同，
+    但使用明確型別（文字 / 月份為 category、花費為 float32、日期用固定格式解析），
+    同一時間只會有一個未清理的批次在記憶體中，適合很大的旅遊紀錄檔。
+    """
+    chunks = [_clean_travel_chunk(chunk)
+              for chunk in pd.read_csv(path, dtype=TRAVEL_READ_DTYPES, chunksize=chunksize)]
+
+    # 逐欄串接（各批次的 category 類別不同，先合併類別，避免退化成 object），串接完就釋放該欄
+    column_names = list(chunks[0].columns)
+    index = pd.Index(pd.concat([c.index.to_series() for c in chunks]))
+    columns = {}
+    for col in column_names:
+        if col in TRAVEL_CATEGORY_COLUMNS:
+            columns[col] = union_categoricals([c[col] for c in chunks], sort_categories=True)
+        elif col == 'Start month':
+            columns[col] = union_categoricals([c[col] for c in chunks])  # ← 保持月份順序
+        else:
+            columns[col] = pd.concat([c[col] for c in chunks]).to_numpy()
+        for c in chunks:
+            del c[col]
+    travel_df = pd.DataFrame(columns, index=index)
+
+    # 以5歲為一組，劃分年齡區間（規則同 travel_data_clean）
+    min_age = travel_df['Traveler age'].min()
+    max_age = travel_df['Traveler age'].max()
+    bins = list(range(int(min_age), int(max_age), 5))
+    labels = [f'{i}-{i+4}' for i in bins[:-1]]
+    travel_df.insert(travel_df.columns.get_loc('Start month'), 'Age group',
+                     pd.cut(travel_df['Traveler age'], bins=bins, labels=labels))
+    return travel_df
+
 def countryinfo_data_clean(countryinfo_df):
     # 去除空值
     countryinfo_df = countryinfo_df.dropna()
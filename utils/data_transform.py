@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from .const import ALERT_RANK_MAP
-from .data_validation import is_exempt, minmax
+from .data_validation import is_exempt
 
 def pick_country_level(df_merged, matched_countries):
     """取國家層欄位並做簡單聚合（拿到第一個非空值）"""
@@ -33,12 +33,12 @@ def filter_by_alert_and_visa(df_country, alert_max, visa_only):
     """依 Travel Alert 門檻 + 是否只要免簽國過濾"""
     if alert_max is not None:
         max_rank = get_alert_rank(alert_max)
-        # ← 將每列的 Travel Alert 轉成 rank 再比大小
-        df_country = df_country[df_country['Travel Alert'].apply(get_alert_rank) <= max_rank]
+        # ← 將每列的 Travel Alert 轉成 rank 再比大小（先轉 object，category 欄位才不會得到無法比大小的類別）
+        df_country = df_country[df_country['Travel Alert'].astype(object).apply(get_alert_rank) <= max_rank]
 
     if 'exempt' in (visa_only or []):
         if 'Visa_exempt_entry' in df_country.columns:
-            df_country = df_country[df_country['Visa_exempt_entry'].apply(is_exempt)]
+            df_country = df_country[df_country['Visa_exempt_entry'].astype(object).apply(is_exempt)]
     return df_country
 
 def sanitize_cost_bounds(cost_min, cost_max):
@@ -58,16 +58,6 @@ def preprocess_travel_df(df):
     df['acc_daily_cost'] = df['acc_trip_cost'] / df['Duration (days)']
     return df
 
-def filter_by_cost_and_types(df, cost_min, cost_max, acc_types):
-    """依住宿費區間 + 住宿類型多選過濾"""
-    if cost_min is not None:
-        df = df[df['Accommodation cost'] >= float(cost_min)]
-    if cost_max is not None:
-        df = df[df['Accommodation cost'] <= float(cost_max)]
-    if acc_types:
-        df = df[df['Accommodation type'].isin(acc_types)]
-    return df
-
 def get_alert_rank(alert_name, default_rank=3):
     """
     根據 ALERT_RANK_MAP 取得這個警示顏色的等級。
@@ -94,17 +84,15 @@ def get_dashboard_default_values(df_merged):
 def adjust_costs_with_cpi(out_df):
     """用 CPI 做相對調整，讓不同國家成本可比"""
     out = out_df.copy()
+    base = out['median_daily_acc_cost']
     cpi_median = out['CPI'].dropna().median() if 'CPI' in out.columns else np.nan
 
-    def adjust_cost(row):
-        base = row['median_daily_acc_cost']
-        cpi  = row['CPI'] if 'CPI' in row and pd.notna(row['CPI']) else np.nan
-        # ← 僅在都有數值且中位數 > 0 才做比例調整
-        if pd.notna(base) and pd.notna(cpi) and pd.notna(cpi_median) and cpi_median > 0:
-            return base * (cpi / cpi_median)
-        return base
-
-    out['adj_daily_acc_cost'] = out.apply(adjust_cost, axis=1)  # ← row-wise 計算
+    # ← 僅在都有數值且中位數 > 0 才做比例調整，否則保留原值（整欄向量化計算）
+    if pd.notna(cpi_median) and cpi_median > 0:
+        cpi = out['CPI']
+        out['adj_daily_acc_cost'] = base.where(cpi.isna(), base * (cpi / cpi_median))
+    else:
+        out['adj_daily_acc_cost'] = base
     return out
 
 def normalize_weights(w_safety, w_cost):
@@ -114,6 +102,63 @@ def normalize_weights(w_safety, w_cost):
     denom = (ws + wc) or 1  # ← 若兩者皆 0，令分母為 1，避免 ZeroDivision
     return ws / denom, wc / denom
 
+def minmax_columns(values):
+    """
+    對 (n_rows, n_metrics) 陣列逐欄做 0~1 MinMax，規則同 data_validation.minmax：
+    整欄皆 NaN → NaN；最大值 == 最小值 → 整欄 0.5（含缺值的列）
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    has_any = valid.any(axis=0)
+    lo = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+    hi = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+    span = np.where(hi > lo, hi - lo, 1.0)
+
+    scaled = (values - lo) / span
+    scaled[:, has_any & (hi == lo)] = 0.5
+    scaled[:, ~has_any] = np.nan
+    return scaled
+
+def weighted_scores(metric_scores, weights):
+    """
+    NaN-aware 加權總分（0~100）。
+
+    metric_scores: (n_rows, n_metrics) 的 0~1 分數，NaN 代表該列沒有這個指標
+    weights:       長度 n_metrics 的權重
+    每一列只用有值的指標，並把實際參與的權重再正規化；沒有任何有效指標或權重和為 0 時給 NaN。
+    """
+    metric_scores = np.asarray(metric_scores, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    valid = ~np.isnan(metric_scores)
+    row_weights = np.where(valid, weights, 0.0)
+    denom = row_weights.sum(axis=1)
+    numer = (np.where(valid, metric_scores, 0.0) * row_weights).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = 100 * numer / denom
+    scores[denom == 0] = np.nan
+    return scores
+
+def score_metrics(df, metric_specs):
+    """
+    依多個指標計算加權總分，可任意擴充指標數量。
+
+    metric_specs: [(欄位名稱, 權重, 越大越好?), ...]；df 沒有的欄位視為全部缺值。
+    回傳長度 len(df) 的 numpy 陣列（0~100）。
+    """
+    columns = []
+    for col, _, _ in metric_specs:
+        if col in df.columns:
+            columns.append(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float))
+        else:
+            columns.append(np.full(len(df), np.nan))
+    values = np.column_stack(columns) if columns else np.empty((len(df), 0))
+
+    scaled = minmax_columns(values)
+    higher_is_better = np.array([hib for _, _, hib in metric_specs], dtype=bool)
+    scaled[:, ~higher_is_better] = 1 - scaled[:, ~higher_is_better]  # ← 越小越好的指標反向
+    weights = [(w or 0) for _, w, _ in metric_specs]
+    return weighted_scores(scaled, weights)
+
 def compute_scores(out, w_safety, w_cost):
     """把 Safety 與 Cost（反向）做 0~1 MinMax，依權重算總分"""
     out = out.copy()
@@ -126,28 +171,12 @@ def compute_scores(out, w_safety, w_cost):
     # 成本 × CPI 調整
     out = adjust_costs_with_cpi(out)
 
-    # 指標正規化：安全越高越好；成本越低越好（所以要 1 - minmax）
-    s_safety  = minmax(out['Safety Index']) if 'Safety Index' in out.columns else None
-    s_cost_raw = minmax(out['adj_daily_acc_cost'])
-    s_cost = 1 - s_cost_raw if s_cost_raw is not None else None  # ← 成本越低分數越高
-
+    # 安全越高越好；成本越低越好。每列只用有值的指標並重新正規化權重，拉到 0~100 分
     ws, wc = normalize_weights(w_safety, w_cost)
-
-    scores = []
-    for i in range(len(out)):
-        parts, wts = [], []
-        if s_safety is not None and pd.notna(s_safety.iloc[i]):
-            parts.append(s_safety.iloc[i]); wts.append(ws)
-        if s_cost is not None and pd.notna(s_cost.iloc[i]):
-            parts.append(s_cost.iloc[i]);   wts.append(wc)
-
-        if len(parts) == 0 or sum(wts) == 0:
-            scores.append(np.nan)  # ← 沒有任何有效指標時給 NaN
-        else:
-            norm = sum(wts)
-            wts = [w / norm for w in wts]  # ← 實際參與的權重再正規化一次
-            scores.append(100 * sum(p * w for p, w in zip(parts, wts)))  # ← 拉到 0~100 分
-    out['Score'] = scores
+    out['Score'] = score_metrics(out, [
+        ('Safety Index', ws, True),
+        ('adj_daily_acc_cost', wc, False),
+    ])
     return out
 
 def prepare_country_compare_data(countries, metrics, df_merged):
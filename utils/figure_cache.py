@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_FIGURE_CACHE_PATH = './cache/figures.sqlite'
+# 產生 Overview 圖表的程式碼；任何一個改變，快取中的舊圖就不再命中
+FIGURE_CODE_FILES = ['visualization.py', 'geo_index.py', 'count_cube.py', 'const.py']
+
+
+def figure_code_version(code_files=FIGURE_CODE_FILES):
+    """圖表程式碼 (utils/ 下的 code_files) 的內容雜湊，與資料版本一起當作 FigureCache 的 version"""
+    h = hashlib.sha256()
+    here = os.path.dirname(__file__)
+    for name in code_files:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class FigureCache:
+    """
+    Overview 圖表的 LRU 快取 (Bounded LRU figure cache)。
+
+    - 以 (函式名稱, 下拉選單參數, 資料版本) 為鍵，存 Plotly 圖表序列化後的 JSON。
+    - 兩層：本 process 的記憶體 LRU（命中時只是一次 dict 查詢），後面是所有 Dash worker 共用的 SQLite 檔案；
+      SQLite 超過 max_entries 時淘汰最久沒用到的圖。
+    - 每個 thread 使用一條長期的連線，不必每次查詢都開關連線（關閉時會做 WAL checkpoint，很慢）。
+    - 命中時不立即寫入 last_access，先記在記憶體，累積 touch_batch 筆或寫入新圖時一次更新。
+    - 資料版本不同（CSV 有變動）時自然不會命中，舊的圖會逐漸被淘汰；
+      version 也應包含 figure_code_version()，圖表程式碼改變時同樣不會拿到舊的圖。
+    - hits / misses 為本 process 的命中統計，可由 stats() 取得。
+    """
+
+    def __init__(self, path=DEFAULT_FIGURE_CACHE_PATH, max_entries=512, version='',
+                 memory_entries=None, touch_batch=64):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = max_entries if memory_entries is None else memory_entries
+        self.touch_batch = touch_batch
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn()
+
+    def _conn(self):
+        """本 thread 的連線（第一次使用時建立）；fork 出來的 worker 不沿用父 process 的連線"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS figures ('
+                    'key TEXT PRIMARY KEY, figure TEXT NOT NULL, last_access REAL NOT NULL)'
+                )
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _key(self, name, args):
+        return json.dumps([name, self.version, *args], ensure_ascii=False, default=str)
+
+    def _remember(self, key, figure):
+        with self._lock:
+            self._memory[key] = figure
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _hit(self, key):
+        """記錄命中；累積 touch_batch 筆時寫回 last_access"""
+        with self._lock:
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) < self.touch_batch:
+                return
+            touched, self._touched = self._touched, {}
+        self._flush_touched(touched)
+
+    def _flush_touched(self, touched):
+        if not touched:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany('UPDATE figures SET last_access = ? WHERE key = ?',
+                             [(t, k) for k, t in touched.items()])
+
+    def get_figure(self, generate_fn, df, *args, **kwargs):
+        """
+        回傳 generate_fn(df, *args, **kwargs) 的圖表（dict 格式，可直接給 dcc.Graph；多次呼叫共用同一個 dict，請勿修改）。
+        df 由資料版本代表，不納入鍵；kwargs 只能放不影響圖表內容的參數（例如索引），也不納入鍵。
+        命中時不會執行 generate_fn。
+        """
+        key = self._key(generate_fn.__name__, args)
+        with self._lock:
+            figure = self._memory.get(key)
+            if figure is not None:
+                self._memory.move_to_end(key)
+        if figure is not None:
+            self._hit(key)
+            return figure
+
+        row = self._conn().execute('SELECT figure FROM figures WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            figure = json.loads(row[0])
+            self._remember(key, figure)
+            self._hit(key)
+            return figure
+
+        with self._lock:
+            self.misses += 1
+        fig_json = generate_fn(df, *args, **kwargs).to_json()
+        self._store(key, fig_json)
+        figure = json.loads(fig_json)
+        self._remember(key, figure)
+        return figure
+
+    def _store(self, key, fig_json):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        self._flush_touched(touched)
+        conn = self._conn()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO figures (key, figure, last_access) VALUES (?, ?, ?)',
+                         (key, fig_json, time.time()))
+            conn.execute('DELETE FROM figures WHERE key NOT IN '
+                         '(SELECT key FROM figures ORDER BY last_access DESC LIMIT ?)', (self.max_entries,))
+
+    def warm(self, generate_fn, df, arg_list, **kwargs):
+        """預先建立 arg_list 中每一組參數的圖表（已在快取中的會略過）"""
+        for args in arg_list:
+            self.get_figure(generate_fn, df, *args, **kwargs)
+
+    def stats(self):
+        entries = self._conn().execute('SELECT COUNT(*) FROM figures').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries,
+                'memory_entries': len(self._memory), 'max_entries': self.max_entries, 'version': self.version}
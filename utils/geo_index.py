@@ -0,0 +1,55 @@
+import numpy as np
+
+from .const import COUNTRY_ISO_MAP, MAP_METRICS
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+def country_table(df, metrics=MAP_METRICS):
+    """
+    地圖用的國家表：每個國家一列（國家、洲、ISO 國碼、各項指標）。
+    同一國家的指標在每一列都相同，取平均即為該值；沒有 ISO 國碼的國家略過。
+    """
+    metrics = [m for m in metrics if m in df.columns]
+    table = (df.groupby('Destination', observed=True, sort=True)
+               .agg(Continent=('Continent', 'first'), **{m: (m, 'mean') for m in metrics})
+               .reset_index())
+    table['Destination'] = table['Destination'].astype(str)
+    table['Continent'] = table['Continent'].astype(object)
+    table['iso'] = table['Destination'].map(COUNTRY_ISO_MAP)
+    return table.dropna(subset=['iso']).reset_index(drop=True)
+
+
+class GeoIndex:
+    """
+    Overview 圖表用的洲 / 國家索引 (Pre-grouped geo index)。
+
+    由 df_merged 建立一次，記錄每個洲、每個國家對應的列位置，以及每個國家一列的地圖指標表，
+    圖表篩選時直接依位置取列，不必每次對整個 DataFrame 做布林比較。
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.by_continent = {k: np.asarray(v) for k, v in df.groupby('Continent').indices.items()}
+        self.by_destination = {k: np.asarray(v) for k, v in df.groupby('Destination').indices.items()}
+        # 下拉選單的值可能是洲也可能是國家 → 兩者聯集
+        self.by_geo = {}
+        for key in set(self.by_continent) | set(self.by_destination):
+            self.by_geo[key] = np.union1d(self.by_continent.get(key, _EMPTY), self.by_destination.get(key, _EMPTY))
+        self.countries = country_table(df)
+        self.countries_by_continent = {k: np.asarray(v) for k, v in
+                                       self.countries.groupby('Continent').indices.items()}
+
+    def positions(self, value):
+        """洲或國家等於 value 的列位置"""
+        return self.by_geo.get(value, _EMPTY)
+
+    def rows(self, value):
+        """等同 df[(df['Continent'] == value) | (df['Destination'] == value)]"""
+        return self.df.take(self.positions(value))
+
+    def continent_countries(self, continent=None):
+        """某洲（None 代表全部）的國家表（見 country_table，地圖用）"""
+        if continent is None:
+            return self.countries
+        return self.countries.take(self.countries_by_continent.get(continent, _EMPTY))
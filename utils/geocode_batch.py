@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from .geocode_cache import GeocodeCache, cached_geocode, make_nominatim_geocoder, normalize_key
+from .geocode_executor import (DONE_STATUSES, STATUS_MISS, STATUS_OK, STATUS_PENDING,
+                               GeocodeExecutor, TokenBucket)
+
+DEFAULT_ATTRACTIONS_PATH = './data/Attractions.csv'
+DEFAULT_COORDS_PATH = './data/Attractions_geo.parquet'
+COORD_COLUMNS = ['key', 'country', 'attraction', 'lat', 'lng', 'status', 'row_hash']
+HASH_COLUMNS = ['attraction', 'address', 'city', 'country']
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 1.0   # Nominatim 使用政策：每秒最多 1 次請求
+
+
+def build_queries(row):
+    """
+    依序產生要嘗試的查詢字串：
+        1. 地址 + 城市 + 國家（最精確）
+        2. 景點名稱 + 城市 + 國家（地址查不到時的備案）
+    """
+    def join(*cols):
+        parts = [str(row[c]).strip() for c in cols if c in row and pd.notna(row[c]) and str(row[c]).strip()]
+        return ', '.join(parts)
+
+    queries = [join('address', 'city', 'country'), join('attraction', 'city', 'country')]
+    return [q for i, q in enumerate(queries) if q and q not in queries[:i]]
+
+
+def geocode_row(row, cache, geocode):
+    """對單一景點依序嘗試 build_queries，回傳第一個查到的 (lat, lng) 或 None"""
+    for query in build_queries(row):
+        latlng = cached_geocode(cache, geocode, query)
+        if latlng:
+            return latlng
+    return None
+
+
+def row_hash(row):
+    """名稱、地址、城市、國家的雜湊；座標檔中的值與目前資料不同時代表這列改過、要重新查詢"""
+    parts = [str(row[c]).strip() if c in row and pd.notna(row[c]) else '' for c in HASH_COLUMNS]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def read_coords(path=DEFAULT_COORDS_PATH):
+    """
+    讀取座標檔；不存在時回傳空表。
+    舊版座標檔沒有 status / row_hash：有座標視為 ok、沒有視為 miss，row_hash 留空（不判斷是否改過）。
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COORD_COLUMNS)
+    coords = pd.read_parquet(path)
+    if 'status' not in coords:
+        coords['status'] = np.where(coords['lat'].notna(), STATUS_OK, STATUS_MISS)
+    if 'row_hash' not in coords:
+        coords['row_hash'] = ''
+    coords['row_hash'] = coords['row_hash'].fillna('')
+    return coords[COORD_COLUMNS]
+
+
+def write_coords(coords_df, path=DEFAULT_COORDS_PATH):
+    """先寫到暫存檔再取代，避免中斷時留下寫一半的檔案"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    coords_df[COORD_COLUMNS].to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def needs_geocode(record, new_hash):
+    """座標檔中沒有、上次未完成（pending / error）、或名稱地址改過的景點要重新查詢"""
+    if record is None or record['status'] not in DONE_STATUSES:
+        return True
+    return bool(record['row_hash']) and record['row_hash'] != new_hash
+
+
+def geocode_attractions(attractions_df, cache, geocode, coords_path=DEFAULT_COORDS_PATH, batch_size=20,
+                        max_workers=DEFAULT_WORKERS, limiter=None, on_progress=None):
+    """
+    以 thread pool 對 attractions_df 做地理編碼並寫入 coords_path (Parquet)。
+
+    - 每個景點（以名稱 + 地址當鍵）記錄狀態 pending / ok / miss / error；
+      重跑時只處理新的、改過的、或上次沒完成 / 出錯的景點。
+    - limiter（例如 TokenBucket）由所有 thread 共用，只有快取未命中、真的呼叫 geocode 時才取 token；
+      None 表示不限速（geocode 本身已限速，或測試用的 stub）。
+    - 開始前先把要處理的景點標成 pending 寫檔，之後每完成 batch_size 筆寫檔一次，中斷後重跑會從上次的進度接續。
+    - on_progress(完成數, 總數) 在每次寫檔後呼叫（例如命令列印出進度）。
+
+    回傳最新的座標表。
+    """
+    coords = read_coords(coords_path)
+    records = {r['key']: r for r in coords.to_dict('records')}
+
+    df = attractions_df.dropna(subset=['attraction']).copy()
+    df['key'] = [normalize_key(a, addr) for a, addr in zip(df['attraction'], df['address'])]
+    df['row_hash'] = [row_hash(r) for _, r in df.iterrows()]
+    df = df.drop_duplicates(subset='key')
+    todo = df[[needs_geocode(records.get(k), h) for k, h in zip(df['key'], df['row_hash'])]]
+
+    def frame():
+        return pd.DataFrame(list(records.values()), columns=COORD_COLUMNS)
+
+    rows = [r for _, r in todo.iterrows()]
+    for r in rows:
+        records[r['key']] = {'key': r['key'], 'country': r['country'], 'attraction': r['attraction'],
+                             'lat': np.nan, 'lng': np.nan, 'status': STATUS_PENDING, 'row_hash': r['row_hash']}
+    if rows:
+        write_coords(frame(), coords_path)
+
+    executor = GeocodeExecutor(geocode, limiter=limiter, max_workers=max_workers)
+    results = executor.run(rows, lambda row, limited: geocode_row(row, cache, limited))
+    for n, (r, status, latlng) in enumerate(results, 1):
+        lat, lng = latlng if latlng else (np.nan, np.nan)
+        records[r['key']].update(lat=lat, lng=lng, status=status)
+        if n % batch_size == 0 or n == len(rows):
+            write_coords(frame(), coords_path)
+            if on_progress is not None:
+                on_progress(n, len(rows))
+
+    return frame()
+
+
+def attach_coords(attractions_df, coords_df):
+    """
+    依名稱 + 地址把座標對回 attractions_df，回傳與 attractions_df 同 index 的表：
+        - lat / lng：沒有座標的列為 NaN
+        - geocoded：座標檔是否已處理完這個景點（ok 或 miss；miss 時 lat/lng 為 NaN）
+    """
+    keys = pd.Series([normalize_key(a, addr) for a, addr in
+                      zip(attractions_df['attraction'], attractions_df['address'])],
+                     index=attractions_df.index)
+    lookup = coords_df.drop_duplicates(subset='key', keep='last').set_index('key')
+    return pd.DataFrame({
+        'lat': keys.map(lookup['lat']).astype(float),
+        'lng': keys.map(lookup['lng']).astype(float),
+        'geocoded': keys.map(lookup['status']).isin(DONE_STATUSES),
+    }, index=attractions_df.index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='離線批次將 Attractions.csv 轉成經緯度 (Parquet)')
+    parser.add_argument('--input', default=DEFAULT_ATTRACTIONS_PATH)
+    parser.add_argument('--output', default=DEFAULT_COORDS_PATH)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='每秒最多呼叫幾次地理編碼服務')
+    args = parser.parse_args(argv)
+
+    attractions_df = pd.read_csv(args.input)
+    # 限速交給共用的 TokenBucket，geocoder 本身不再包 RateLimiter
+    coords = geocode_attractions(attractions_df, GeocodeCache(), make_nominatim_geocoder(min_delay_seconds=0),
+                                 coords_path=args.output, batch_size=args.batch_size,
+                                 max_workers=args.workers, limiter=TokenBucket(args.rate),
+                                 on_progress=lambda n, total: print(f'geocoded {n}/{total}'))
+    counts = coords['status'].value_counts()
+    print(f'{coords["lat"].notna().sum()}/{len(coords)} attractions have coordinates -> {args.output} '
+          f'({", ".join(f"{k}: {v}" for k, v in counts.items())})')
+
+
+if __name__ == '__main__':
+    # 使用方式：python -m utils.geocode_batch [--batch-size 20] [--workers 4] [--rate 1]
+    main()
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+DEFAULT_CACHE_PATH = './cache/geocode.sqlite'
+DEFAULT_TTL = 30 * 24 * 3600          # 查到座標：保留 30 天
+DEFAULT_NEGATIVE_TTL = 24 * 3600      # 查無結果：保留 1 天後再重查
+
+
+def normalize_key(name, address=None):
+    """把景點名稱與地址轉成快取鍵（去頭尾與多餘空白、轉小寫，略過空值）"""
+    parts = []
+    for v in (name, address):
+        if v is None or (not isinstance(v, str) and pd.isna(v)):
+            continue
+        s = ' '.join(str(v).split()).lower()
+        if s and s != 'nan':
+            parts.append(s)
+    return '|'.join(parts)
+
+
+class GeocodeCache:
+    """
+    以 SQLite 存在磁碟上的地理編碼快取 (Disk-backed geocode cache)。
+
+    - 成功的結果存 (lat, lng)，失敗（查無結果）也會存一筆 negative entry，
+      避免同一個找不到的地點每次都打網路。
+    - 兩種結果各自有 TTL，過期視為未命中。
+    - 每次操作都開新的連線，多個 Dash worker / thread 共用同一個檔案也安全。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS geocode ('
+                'key TEXT PRIMARY KEY, lat REAL, lng REAL, updated_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        """
+        回傳 (hit, latlng)：
+            - (True, (lat, lng))  命中且有座標
+            - (True, None)        命中 negative entry（之前查過但找不到）
+            - (False, None)       未命中或已過期
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT lat, lng, updated_at FROM geocode WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return False, None
+        lat, lng, updated_at = row
+        found = lat is not None and lng is not None
+        ttl = self.ttl if found else self.negative_ttl
+        if time.time() - updated_at > ttl:
+            return False, None
+        return True, ((lat, lng) if found else None)
+
+    def set(self, key, latlng):
+        """寫入一筆結果；latlng 為 None 代表查無結果"""
+        lat, lng = latlng if latlng is not None else (None, None)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO geocode (key, lat, lng, updated_at) VALUES (?, ?, ?, ?)',
+                (key, lat, lng, time.time())
+            )
+
+
+def cached_geocode(cache, geocode, name, address=None):
+    """
+    先查快取，未命中才呼叫 geocode(name)。
+
+    geocode 為任意可呼叫物件，回傳帶有 latitude / longitude 的物件（例如 geopy 的 Location）
+    或 None；測試時可以傳入不連網的 stub。網路錯誤等例外不寫入快取，下次仍會重試。
+
+    回傳 (lat, lng) 或 None。
+    """
+    key = normalize_key(name, address)
+    hit, latlng = cache.get(key)
+    if hit:
+        return latlng
+
+    try:
+        location = geocode(str(name))
+    except Exception:
+        return None
+
+    latlng = (location.latitude, location.longitude) if location else None
+    cache.set(key, latlng)
+    return latlng
+
+
+def make_nominatim_geocoder(user_agent='my_dash_app', min_delay_seconds=1):
+    """
+    建立 Nominatim 地理編碼器（含 RateLimiter，每次至少間隔 min_delay_seconds 秒）。
+    min_delay_seconds 為 0 / None 時回傳未限速的 geocode，由呼叫端自行限速
+    （例如 utils.geocode_executor.TokenBucket）。
+
+    兩種情況網路錯誤都會丟出例外、不會變成 None：RateLimiter 預設會吞掉例外回傳 None，
+    cached_geocode 就會把逾時當成查無結果寫進快取一整天。也不在這裡重試，下次查詢時再試即可。
+    """
+    from geopy.geocoders import Nominatim
+    from geopy.extra.rate_limiter import RateLimiter
+
+    geolocator = Nominatim(user_agent=user_agent)
+    if not min_delay_seconds:
+        return geolocator.geocode
+    return RateLimiter(geolocator.geocode, min_delay_seconds=min_delay_seconds, max_retries=0,
+                       swallow_exceptions=False)
+
+
+def warm_geocode_cache(attractions_df, cache, geocode):
+    """
+    離線預熱快取：對 attractions_df 中每個景點做一次 cached_geocode。
+    已在快取中的景點不會再打網路。回傳 (成功數, 查無數)。
+    """
+    found, missing = 0, 0
+    for name, address in zip(attractions_df['attraction'], attractions_df['address']):
+        if normalize_key(name) == '':
+            continue
+        if cached_geocode(cache, geocode, name, address):
+            found += 1
+        else:
+            missing += 1
+    return found, missing
+
+
+if __name__ == '__main__':
+    # 使用方式：python -m utils.geocode_cache
+    df = pd.read_csv('./data/Attractions.csv')
+    found, missing = warm_geocode_cache(df, GeocodeCache(), make_nominatim_geocoder())
+    print(f'geocode cache warmed: {found} found, {missing} not found')
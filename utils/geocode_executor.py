@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 座標檔中每個景點的處理狀態
+STATUS_PENDING = 'pending'   # 已排入、尚未完成（中斷時會留下）
+STATUS_OK = 'ok'             # 查到座標
+STATUS_MISS = 'miss'         # 查詢成功但沒有結果
+STATUS_ERROR = 'error'       # 網路錯誤等例外，下次重跑會再試
+DONE_STATUSES = (STATUS_OK, STATUS_MISS)
+
+
+class TokenBucket:
+    """
+    全域速率限制 (Token bucket)：每秒補充 rate 個 token，最多累積 capacity 個。
+    每次呼叫地理編碼服務前 acquire() 一個 token；多個 thread 共用同一個 bucket，
+    任何長度 T 的時間內最多 capacity + rate × T 次呼叫。
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class GeocodeExecutor:
+    """
+    以 thread pool 平行處理地理編碼。
+
+    - geocode 為實際呼叫服務的函式（例如 Nominatim 的 geocode），每次呼叫前先向 limiter 取 token，
+      所以不論 thread 數多少，對服務的呼叫頻率都不會超過 limiter 的速率；快取命中不會消耗 token。
+    - 每個項目回報狀態：ok / miss / error（呼叫過程中有例外且沒有查到座標）。
+    """
+
+    def __init__(self, geocode, limiter=None, max_workers=4):
+        self.geocode = geocode
+        self.limiter = limiter
+        self.max_workers = max_workers
+
+    def _limited(self, errors):
+        def call(query):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                return self.geocode(query)
+            except Exception as exc:
+                errors.append(exc)
+                raise
+        return call
+
+    def _run_one(self, item, fn):
+        errors = []
+        try:
+            latlng = fn(item, self._limited(errors))
+        except Exception:
+            return STATUS_ERROR, None
+        if latlng:
+            return STATUS_OK, latlng
+        return (STATUS_ERROR if errors else STATUS_MISS), None
+
+    def run(self, items, fn):
+        """
+        對每個 item 執行 fn(item, geocode)（fn 內部用傳入的 geocode 呼叫服務），
+        依完成順序 yield (item, status, latlng)。
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._run_one, item, fn): item for item in items}
+            for future in as_completed(futures):
+                status, latlng = future.result()
+                yield futures[future], status, latlng
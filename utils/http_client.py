@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .geocode_cache import normalize_key
+
+GOOGLE_MAPS_BASE_URL = 'https://maps.googleapis.com/maps/api'
+DEFAULT_HTTP_CACHE_PATH = './cache/http.sqlite'
+DEFAULT_TIMEOUT = (3.05, 10)        # (連線, 讀取) 秒
+DEFAULT_TTL = 24 * 3600             # Google 回應保留 1 天
+PAGE_TOKEN_TTL = 60                 # 帶 next_page_token 的回應：token 幾分鐘內就失效，只短暫保留
+DEFAULT_MAX_ENTRIES = 10000         # SQLite 檔案最多保留的回應筆數
+RETRY_STATUS = (429, 500, 502, 503, 504)
+CACHEABLE_STATUS = ('OK', 'ZERO_RESULTS')  # Google API 的 status；錯誤（配額、金鑰）不快取
+
+
+class TTLCache:
+    """
+    LRU + TTL 的回應快取 (LRU + TTL response cache)。
+
+    - 記憶體中最多 maxsize 筆，超過時淘汰最久沒用到的；每筆超過 ttl 秒視為過期（set 時可個別指定 ttl）。
+    - 指定 path 時同時寫入 SQLite 檔案，重新啟動或其他 worker 也能命中；path=None 只用記憶體。
+      每次寫入時刪掉過期的回應，並只保留最近寫入的 max_entries 筆。
+    """
+
+    def __init__(self, maxsize=1024, ttl=DEFAULT_TTL, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None:
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS responses ('
+                    'key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL, expires_at REAL)'
+                )
+                columns = {row[1] for row in conn.execute('PRAGMA table_info(responses)')}
+                if 'expires_at' not in columns:
+                    # 舊版的快取檔沒有個別的到期時間 → 以建立時的 ttl 補上
+                    conn.execute('ALTER TABLE responses ADD COLUMN expires_at REAL')
+                    conn.execute('UPDATE responses SET expires_at = updated_at + ?', (ttl,))
+                conn.execute('CREATE INDEX IF NOT EXISTS responses_updated_at ON responses (updated_at)')
+                conn.execute('CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key):
+        """回傳 (hit, value)；未命中或已過期為 (False, None)"""
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if now <= item[1]:
+                    self._data.move_to_end(key)
+                    return True, item[0]
+                del self._data[key]
+
+        if self.path is None:
+            return False, None
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT value, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None or now > row[1]:
+            return False, None
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return True, value
+
+    def set(self, key, value, ttl=None):
+        """存入 value；ttl 為 None 時使用建構時的 ttl"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+        if self.path is not None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO responses (key, value, updated_at, expires_at) '
+                             'VALUES (?, ?, ?, ?)', (key, json.dumps(value, ensure_ascii=False), now, expires_at))
+                conn.execute('DELETE FROM responses WHERE expires_at < ?', (now,))
+                conn.execute('DELETE FROM responses WHERE key NOT IN '
+                             '(SELECT key FROM responses ORDER BY updated_at DESC LIMIT ?)', (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.path is not None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute('DELETE FROM responses')
+
+
+def make_session(retries=3, backoff_factor=0.5, pool_maxsize=10):
+    """
+    建立共用的 requests.Session：連線池 (keep-alive) + 失敗重試。
+    429 / 5xx 與連線錯誤會以 backoff_factor × 2^n 秒的間隔重試 retries 次。
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def nearby_key(lat, lng, radius, place_type, page_token=None, precision=4):
+    """Nearby Search 的快取鍵：經緯度取到小數第 precision 位（4 位約 11 公尺）"""
+    parts = ['nearby', f'{round(float(lat), precision):.{precision}f}', f'{round(float(lng), precision):.{precision}f}',
+             str(int(radius)), str(place_type)]
+    if page_token:
+        parts.append(page_token)
+    return '|'.join(parts)
+
+
+class GoogleMapsClient:
+    """
+    Google Maps Geocoding / Places Nearby Search 的共用用戶端。
+
+    - 所有請求共用同一個 Session（連線池、重試），每個請求都有 timeout。
+    - 成功的回應（status 為 OK / ZERO_RESULTS）存進 TTLCache，同樣的查詢不會再打 API；
+      帶 next_page_token 的回應只保留 PAGE_TOKEN_TTL 秒，過了之後 token 已失效，要重新查第一頁。
+    - base_url 可以換成本機的測試伺服器。
+    """
+
+    def __init__(self, session=None, cache=None, timeout=DEFAULT_TIMEOUT, base_url=GOOGLE_MAPS_BASE_URL):
+        self.session = session or make_session()
+        self.cache = cache if cache is not None else TTLCache()
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+
+    def get_json(self, path, params, cache_key=None):
+        """GET base_url/path 並回傳 JSON；有 cache_key 時先查快取"""
+        if cache_key is not None:
+            hit, value = self.cache.get(cache_key)
+            if hit:
+                return value
+        resp = self.session.get(f'{self.base_url}/{path}', params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if cache_key is not None and data.get('status') in CACHEABLE_STATUS:
+            self.cache.set(cache_key, data, ttl=PAGE_TOKEN_TTL if data.get('next_page_token') else None)
+        return data
+
+    def geocode(self, address, api_key):
+        """地址 → Geocoding API 的完整回應"""
+        return self.get_json('geocode/json', {'address': address, 'key': api_key},
+                             cache_key='geocode|' + normalize_key(address))
+
+    def nearby_search(self, lat, lng, api_key, radius=1000, place_type=None, page_token=None):
+        """Places Nearby Search 的完整回應（一頁）；page_token 為上一頁的 next_page_token"""
+        if page_token:
+            params = {'pagetoken': page_token, 'key': api_key}
+        else:
+            params = {'location': f'{lat},{lng}', 'radius': radius, 'key': api_key}
+            if place_type:
+                params['type'] = place_type
+        return self.get_json('place/nearbysearch/json', params,
+                             cache_key=nearby_key(lat, lng, radius, place_type, page_token))
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """整個 process 共用的 GoogleMapsClient（快取寫入 DEFAULT_HTTP_CACHE_PATH）"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = GoogleMapsClient(cache=TTLCache(path=DEFAULT_HTTP_CACHE_PATH))
+        return _default_client
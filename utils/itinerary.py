@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from .data_transform import score_metrics
+from .spatial_index import haversine_km
+
+BUDGET_TYPES = ['食', '活', '住', '景']
+# 候選項目的價值：推薦分數、距離（越近越好）、評分，缺的指標不計入
+VALUE_METRICS = [('weighted_score', 0.5, True), ('distance_km', 0.3, False), ('rating', 0.2, True)]
+DEFAULT_MAX_DP_CELLS = 4_000_000   # DP 表格（項目數 × 預算格數）上限，超過時把金額換成較粗的單位
+DEFAULT_MAX_DP_ITEMS = 2_000       # 單一類型超過這麼多項目時只用貪婪法
+NEUTRAL_VALUE = 50.0               # 沒有任何指標的項目（例如手動輸入的列）給中間值
+MIN_VALUE = 1.0                    # 每個候選至少有這麼多價值，預算夠時最差的項目也會選進來
+
+
+def wishlist_candidates(wishlist, poi_df, lat_col='Lat', lng_col='Lng'):
+    """
+    願望清單的列 → fill_budget 的候選表（type / price，加上能取得的價值指標）。
+
+    從旅遊清單加入的列帶有 poi_id（poi_df 的列位置）：取回 poi_df 中 VALUE_METRICS 有的欄位，
+    並以座標算 distance_km ── 到願望清單所有地點中位數位置的距離，行程越集中越好。
+    沒有 poi_id 或座標的列這些指標為缺值。
+    """
+    df = pd.DataFrame(wishlist, columns=['name', 'type', 'price', 'poi_id'])
+    ids = pd.to_numeric(df['poi_id'], errors='coerce').to_numpy(dtype=float)
+    valid = ~np.isnan(ids) & (ids >= 0) & (ids < len(poi_df))
+    positions = ids[valid].astype(np.intp)
+
+    def lookup(col):
+        out = np.full(len(df), np.nan)
+        if col in poi_df.columns:
+            out[valid] = pd.to_numeric(poi_df[col].take(positions), errors='coerce').to_numpy(dtype=float)
+        return out
+
+    for col, _, _ in VALUE_METRICS:
+        if col != 'distance_km' and col in poi_df.columns:
+            df[col] = lookup(col)
+    lat, lng = lookup(lat_col), lookup(lng_col)
+    located = ~np.isnan(lat) & ~np.isnan(lng)
+    if located.any():
+        df['distance_km'] = haversine_km(lat, lng, np.median(lat[located]), np.median(lng[located]))
+    return df
+
+
+def candidate_values(df, metrics=VALUE_METRICS):
+    """
+    每個候選項目的價值（MIN_VALUE ~ 100）。
+    完全沒有推薦分數 / 距離 / 評分時，以價格當價值（等於「盡量把預算花滿」）；
+    部分項目沒有任何指標時，這些項目給 NEUTRAL_VALUE。
+    """
+    values = score_metrics(df, metrics)
+    if np.isnan(values).all():
+        values = pd.to_numeric(df['price'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    return np.maximum(np.nan_to_num(values, nan=NEUTRAL_VALUE), MIN_VALUE)
+
+
+def knapsack_dp(costs, values, budget, max_cells=DEFAULT_MAX_DP_CELLS):
+    """
+    0/1 背包 DP：在 sum(costs) <= budget 的條件下讓 sum(values) 最大，回傳選到的位置。
+    表格太大時金額改用 unit 元為單位、花費無條件進位，結果一定不超過預算（可能略差於最佳解）。
+    """
+    costs = np.asarray(costs, dtype=float)
+    values = np.asarray(values, dtype=float)
+    n = len(costs)
+    if n == 0 or budget <= 0:
+        return np.flatnonzero((costs <= 0) & (values > 0))
+
+    unit = max(1.0, np.ceil(n * (budget + 1) / max_cells))
+    units = np.ceil(np.maximum(costs, 0) / unit).astype(np.int64)
+    cap = int(budget // unit)
+
+    dp = np.zeros(cap + 1)
+    keep = np.zeros((n, cap + 1), dtype=bool)
+    for i in range(n):
+        c = units[i]
+        if c > cap or values[i] <= 0:
+            continue
+        candidate = dp[:cap + 1 - c] + values[i]
+        better = candidate > dp[c:]
+        keep[i, c:] = better
+        dp[c:] = np.where(better, candidate, dp[c:])
+
+    selected, w = [], cap
+    for i in range(n - 1, -1, -1):
+        if keep[i, w]:
+            selected.append(i)
+            w -= units[i]
+    return np.array(sorted(selected), dtype=np.intp)
+
+
+def knapsack_greedy(costs, values, budget):
+    """
+    貪婪法：依 價值 / 花費 由高到低放入，放得下就放；
+    再和「價值最高的單一項目」比較取較好的（最差也有最佳解的一半）。
+    """
+    costs = np.asarray(costs, dtype=float)
+    values = np.asarray(values, dtype=float)
+    ratio = values / np.maximum(costs, 1e-9)
+    order = np.lexsort((costs, -ratio))
+    selected, spent = [], 0.0
+    for i in order:
+        if values[i] > 0 and spent + costs[i] <= budget:
+            selected.append(i)
+            spent += costs[i]
+    fits = np.flatnonzero((costs <= budget) & (values > 0))
+    if fits.size:
+        best_single = fits[np.argmax(values[fits])]
+        if values[best_single] > values[selected].sum():
+            selected = [best_single]
+    return np.array(sorted(selected), dtype=np.intp)
+
+
+def solve_budget(costs, values, budget, max_cells=DEFAULT_MAX_DP_CELLS, max_items=DEFAULT_MAX_DP_ITEMS):
+    """單一類型：項目不多時用 DP（並與貪婪法取較好的），太多時只用貪婪法"""
+    costs = np.asarray(costs, dtype=float)
+    values = np.asarray(values, dtype=float)
+    greedy = knapsack_greedy(costs, values, budget)
+    if len(costs) > max_items:
+        return greedy
+    dp = knapsack_dp(costs, values, budget, max_cells)
+    return dp if values[dp].sum() >= values[greedy].sum() else greedy
+
+
+def fill_budget(df, budgets, values=None, max_cells=DEFAULT_MAX_DP_CELLS, max_items=DEFAULT_MAX_DP_ITEMS):
+    """
+    在各類型（食 / 活 / 住 / 景）的預算內，挑出總價值最高的候選組合。
+
+    df:      候選項目，需有 type（類型）與 price（花費）欄位；可另有 weighted_score / distance_km / rating
+    budgets: {類型: 預算}
+    values:  每個項目的價值；None 時用 candidate_values(df)
+
+    每個項目只佔用自己類型的預算，多維背包可拆成每個類型各自的一維背包分別求解。
+    回傳 {'selected': 選到的列位置, 'spent': {類型: 花費}, 'value': 總價值}
+    """
+    costs = pd.to_numeric(df['price'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    values = candidate_values(df) if values is None else np.asarray(values, dtype=float)
+    types = df['type'].to_numpy(dtype=object)
+
+    selected, spent = [], {}
+    for t, budget in budgets.items():
+        positions = np.flatnonzero(types == t)
+        picked = positions[solve_budget(costs[positions], values[positions], float(budget or 0),
+                                        max_cells, max_items)]
+        selected.append(picked)
+        spent[t] = float(costs[picked].sum())
+
+    selected = np.sort(np.concatenate(selected)) if selected else np.array([], dtype=np.intp)
+    return {'selected': selected, 'spent': spent, 'value': float(values[selected].sum())}
@@ -0,0 +1,123 @@
+import numpy as np
+
+TILE_SIZE = 256              # Web Mercator 每張圖磚的像素
+DEFAULT_RADIUS_PX = 60       # 同一格（螢幕上 60 × 60 像素）內的點合併成一個群集
+DEFAULT_MIN_ZOOM = 0
+DEFAULT_MAX_ZOOM = 16        # 超過這個縮放層級不再分群，直接回傳個別的點
+DEFAULT_PADDING = 0.1        # 查詢範圍往外多取 10%，拖曳地圖時邊緣的標記不會突然出現
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def project(lat, lng):
+    """經緯度 → Web Mercator 世界座標 (x, y)，範圍 0 ~ 1，y 由北往南增加"""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    lng = np.asarray(lng, dtype=np.float64)
+    s = np.sin(np.radians(lat))
+    x = lng / 360 + 0.5
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * np.pi)
+    return x, y
+
+
+class ClusterLevel:
+    """
+    單一縮放層級的群集：群集中心 (lat, lng)、點數 count，
+    只有一個點的群集 position 為原始列位置，其餘為 -1。依世界座標 x 排序，查詢時用二分搜尋取範圍。
+    """
+
+    def __init__(self, lat, lng, count, position):
+        x, y = project(lat, lng)
+        order = np.argsort(x, kind='stable')
+        self.lat, self.lng, self.count, self.position = lat[order], lng[order], count[order], position[order]
+        self.x, self.y = x[order], y[order]
+
+    def __len__(self):
+        return len(self.count)
+
+    def slots(self, x0, x1, y0, y1):
+        """世界座標範圍 [x0, x1] × [y0, y1] 內的群集（陣列位置）"""
+        lo = np.searchsorted(self.x, x0, side='left')
+        hi = np.searchsorted(self.x, x1, side='right')
+        y = self.y[lo:hi]
+        return lo + np.flatnonzero((y >= y0) & (y <= y1))
+
+
+def grid_cluster(lat, lng, positions, zoom, radius_px=DEFAULT_RADIUS_PX):
+    """把點依 zoom 層級下 radius_px 像素的方格分群，回傳 ClusterLevel"""
+    cells = TILE_SIZE * 2 ** zoom / radius_px   # 每個軸的格子數
+    x, y = project(lat, lng)
+    cx = np.floor(x * cells).astype(np.int64)
+    cy = np.floor(y * cells).astype(np.int64)
+    keys = cx * (int(cells) + 2) + cy
+    _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    c_lat = np.bincount(inverse, weights=lat) / counts
+    c_lng = np.bincount(inverse, weights=lng) / counts
+    position = np.where(counts == 1, positions[first], -1)
+    return ClusterLevel(c_lat, c_lng, counts, position)
+
+
+class ClusterIndex:
+    """
+    地圖標記的伺服器端分群 (Grid clustering per zoom level)。
+
+    - 啟動時對 min_zoom ~ max_zoom 每個縮放層級各分一次群（同一格像素內的點合併），
+      max_zoom 以上直接用個別的點。
+    - viewport() 只回傳目前地圖範圍內的群集與點，回應大小取決於畫面上的標記數，與資料總數無關。
+    """
+
+    def __init__(self, lat, lng, positions=None, radius_px=DEFAULT_RADIUS_PX,
+                 min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM):
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        positions = np.arange(len(lat)) if positions is None else np.asarray(positions, dtype=np.intp)
+        self.min_zoom, self.max_zoom = min_zoom, max_zoom
+        self.levels = {z: grid_cluster(lat, lng, positions, z, radius_px) for z in range(min_zoom, max_zoom + 1)}
+        # max_zoom + 1 以上：每個點自己一個群集
+        self.levels[max_zoom + 1] = ClusterLevel(lat, lng, np.ones(len(lat), dtype=np.int64), positions)
+
+    @classmethod
+    def from_grid(cls, grid, **kwargs):
+        """由 utils.spatial_index.GridIndex 建立（沿用其中已清理過的座標與列位置）"""
+        return cls(grid.lat, grid.lng, grid.positions, **kwargs)
+
+    def __len__(self):
+        return len(self.levels[self.max_zoom + 1])
+
+    def level(self, zoom):
+        z = int(np.clip(np.floor(zoom if zoom is not None else self.min_zoom), self.min_zoom, self.max_zoom + 1))
+        return self.levels[z]
+
+    def viewport(self, bounds, zoom, padding=DEFAULT_PADDING):
+        """
+        bounds = [[south, west], [north, east]]（Leaflet 的地圖範圍；None 代表整個世界）。
+        回傳 (lat, lng, count, position) 四個陣列；position 為 -1 的是多個點的群集。
+        """
+        level = self.level(zoom)
+        if bounds is None:
+            slots = np.arange(len(level))
+        else:
+            (south, west), (north, east) = bounds
+            x0, y1 = project(south, west)
+            x1, y0 = project(north, east)
+            pad_x, pad_y = (x1 - x0) * padding, (y1 - y0) * padding
+            x0, x1, y0, y1 = x0 - pad_x, x1 + pad_x, y0 - pad_y, y1 + pad_y
+            if x1 - x0 >= 1:
+                x0, x1 = 0.0, 1.0
+            # 跨過 ±180 度經線時（經度超出範圍）拆成兩段查詢
+            shift = np.floor(x0)
+            x0, x1 = x0 - shift, x1 - shift
+            parts = [level.slots(x0, min(x1, 1.0), y0, y1)]
+            if x1 > 1:
+                parts.append(level.slots(0.0, x1 - 1, y0, y1))
+            slots = np.unique(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        return level.lat[slots], level.lng[slots], level.count[slots], level.position[slots]
+
+
+def build_cluster_indexes(spatial_index, **kwargs):
+    """
+    由 utils.spatial_index.SpatialIndex 建立分群索引：{None: 全部, 類別: 該類別}，
+    與空間索引同樣略過沒有座標的列。
+    """
+    indexes = {None: ClusterIndex.from_grid(spatial_index.all, **kwargs)}
+    for category, grid in spatial_index.by_category.items():
+        indexes[category] = ClusterIndex.from_grid(grid, **kwargs)
+    return indexes
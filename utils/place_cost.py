@@ -0,0 +1,97 @@
+import numpy as np
+
+# 只有 price_level 時的估計花費
+LEVEL_PRICE_MAP = {1: 100, 2: 300, 3: 600, 4: 1000}
+
+COST_DTYPE = np.dtype([
+    ('price_level', np.float32),   # 沒有為 NaN
+    ('min_cost', np.float64),      # price_range 的下限；沒有或無法解析為 NaN
+    ('max_cost', np.float64),
+    ('mid_cost', np.float64),
+    ('cost', np.float64),          # 估計花費：有 price_range 用中間值，否則依 price_level 對照
+])
+
+
+def parse_price_level(value):
+    """price_level 轉成 int；None 或無法轉換時回傳 None"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def parse_price_range(text):
+    """'$150 - 250' → (150.0, 250.0)；空值或格式不符回傳 None"""
+    if not text or not isinstance(text, str):
+        return None
+    parts = text.replace('$', '').split('-')
+    if len(parts) != 2:
+        return None
+    try:
+        return float(parts[0].strip()), float(parts[1].strip())
+    except ValueError:
+        return None
+
+
+class PlaceCost:
+    """
+    單一店家的花費資訊，抓到 Nearby Search 結果時解析一次：
+        - price_level: int 或 None
+        - min_cost / max_cost / mid_cost: price_range 的下限、上限、中間值（沒有為 None）
+        - cost: 估計花費（與原本 check_budget 的算法相同）
+    """
+
+    __slots__ = ('place_id', 'price_level', 'min_cost', 'max_cost', 'mid_cost', 'cost')
+
+    def __init__(self, place_id, price_level=None, price_range=None):
+        self.place_id = place_id
+        self.price_level = parse_price_level(price_level)
+        bounds = parse_price_range(price_range)
+        self.min_cost, self.max_cost = bounds if bounds else (None, None)
+        self.mid_cost = (self.min_cost + self.max_cost) / 2 if bounds else None
+
+        if price_range and '-' in str(price_range):
+            # 有價格區間就用中間值；區間格式錯誤時視為 0，不改用 price_level
+            self.cost = self.mid_cost or 0
+        else:
+            self.cost = LEVEL_PRICE_MAP.get(self.price_level, 0) if self.price_level else 0
+
+    @classmethod
+    def from_place(cls, place):
+        """由 Nearby Search 的一筆結果 (dict) 建立"""
+        return cls(place.get('place_id'), place.get('price_level'), place.get('price_range'))
+
+    def __repr__(self):
+        return f'PlaceCost({self.place_id!r}, level={self.price_level}, cost={self.cost})'
+
+
+def cost_array(records):
+    """把 PlaceCost 轉成 COST_DTYPE 的結構化陣列，給下面的向量化計算用"""
+    out = np.empty(len(records), dtype=COST_DTYPE)
+    nan = np.nan
+    out['price_level'] = [nan if r.price_level is None else r.price_level for r in records]
+    out['min_cost'] = [nan if r.min_cost is None else r.min_cost for r in records]
+    out['max_cost'] = [nan if r.max_cost is None else r.max_cost for r in records]
+    out['mid_cost'] = [nan if r.mid_cost is None else r.mid_cost for r in records]
+    out['cost'] = [r.cost for r in records]
+    return out
+
+
+def within_level(costs, max_price_level):
+    """price_level 不超過 max_price_level 的店家（沒有 price_level 為 False）"""
+    return costs['price_level'] <= max_price_level
+
+
+def within_budget(costs, budget):
+    """price_range 的下限不超過 budget 的店家（沒有 price_range 或 budget 為 None 時為 False）"""
+    if budget is None:
+        return np.zeros(len(costs), dtype=bool)
+    return costs['min_cost'] <= budget
+
+
+def sum_costs(costs, positions=None):
+    """估計花費合計；positions 為選取的列位置"""
+    selected = costs['cost'] if positions is None else costs['cost'][np.asarray(positions, dtype=np.intp)]
+    return float(selected.sum())
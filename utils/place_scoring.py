@@ -0,0 +1,50 @@
+import numpy as np
+
+from .spatial_index import haversine_km
+
+
+def lower_is_better(values):
+    """
+    將數值標準化到 0-1（越小越好），一次處理整個陣列：
+        - NaN / inf 不參與 min / max，結果為 NaN
+        - 所有有效值都相同時為 0（與原本的 normalize_score 相同）
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    if not valid.any():
+        return np.full(values.shape, np.nan)
+    lo, hi = values[valid].min(), values[valid].max()
+    if hi == lo:
+        return np.where(valid, 0.0, np.nan)
+    return np.where(valid, 1 - (values - lo) / (hi - lo), np.nan)
+
+
+def score_places(lats, lngs, price_levels, user_lat, user_lng, distance_weight=0.5, price_weight=0.5):
+    """
+    批次計算推薦分數（距離越近、價位越低分數越高）。
+
+    lats / lngs / price_levels 為等長陣列，沒有座標或價位的用 NaN。
+        - 沒有座標：距離為 inf，距離分數 0
+        - 沒有價位：價格分數 0.5（中等）
+
+    回傳 (scores, order)：
+        scores: {'distance_km', 'distance_score', 'price_score', 'weighted_score'}，
+                分數為 0-100、四捨五入到小數第二位
+        order:  依 weighted_score 由高到低的列位置（同分時維持原本順序）
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    has_coords = np.isfinite(lats) & np.isfinite(lngs)
+    distance = np.where(has_coords, haversine_km(user_lat, user_lng, lats, lngs), np.inf)
+
+    distance_score = np.nan_to_num(lower_is_better(distance), nan=0.0)
+    price_score = np.nan_to_num(lower_is_better(price_levels), nan=0.5)
+    weighted = np.round((distance_score * distance_weight + price_score * price_weight) * 100, 2)
+
+    scores = {
+        'distance_km': distance,
+        'distance_score': np.round(distance_score * 100, 2),
+        'price_score': np.round(price_score * 100, 2),
+        'weighted_score': weighted,
+    }
+    return scores, np.argsort(-weighted, kind='stable')
@@ -0,0 +1,85 @@
+import asyncio
+
+PLACE_TYPES = ['restaurant', 'cafe', 'bar', 'tourist_attraction']
+DEFAULT_MAX_PAGES = 3          # Nearby Search 每個類型最多 3 頁（60 筆）
+DEFAULT_CONCURRENCY = 4        # 同時進行的請求數上限
+DEFAULT_PAGE_DELAY = 1.0       # next_page_token 發出後要等一下才會生效，重試間隔（秒）
+DEFAULT_TOKEN_RETRIES = 3
+
+
+async def _fetch_type(client, semaphore, lat, lng, api_key, radius, place_type, max_pages, page_delay, token_retries):
+    """
+    依序抓一個類型的每一頁（下一頁要用上一頁的 next_page_token），每頁抓到就 yield (頁碼, results)。
+    token 還沒生效時等 page_delay 秒再試；等待時不佔用 semaphore，其他類型的請求可以同時進行。
+    """
+    token = None
+    for page in range(max_pages):
+        for attempt in range(token_retries + 1):
+            async with semaphore:
+                resp = await asyncio.to_thread(client.nearby_search, lat, lng, api_key, radius, place_type, token)
+            # token 還沒生效時 Google 回 INVALID_REQUEST（不會被快取），等一下再試
+            if not (token and resp.get('status') == 'INVALID_REQUEST') or attempt == token_retries:
+                break
+            await asyncio.sleep(page_delay)
+        yield page, resp.get('results', [])
+        token = resp.get('next_page_token')
+        if not token:
+            return
+
+
+async def iter_nearby_places(client, lat, lng, api_key, radius=1000, place_types=PLACE_TYPES,
+                             max_pages=DEFAULT_MAX_PAGES, concurrency=DEFAULT_CONCURRENCY,
+                             page_delay=DEFAULT_PAGE_DELAY, token_retries=DEFAULT_TOKEN_RETRIES):
+    """
+    各類型、各頁的 Nearby Search 同時進行（最多 concurrency 個請求），
+    每頁回來就 yield (類型, 頁碼, results)，依抵達順序。
+    client 為 utils.http_client.GoogleMapsClient：requests 是同步的，每個請求在 thread 中執行，共用同一個連線池與快取。
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue()
+
+    async def run(place_type):
+        try:
+            async for page, results in _fetch_type(client, semaphore, lat, lng, api_key, radius, place_type,
+                                                   max_pages, page_delay, token_retries):
+                await queue.put((place_type, page, results))
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(run(t)) for t in place_types]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            yield item
+        # 把任務中的例外丟出來
+        for task in tasks:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def search_nearby(client, lat, lng, api_key, radius=1000, place_types=PLACE_TYPES, **kwargs):
+    """
+    同步介面：抓完所有類型、所有頁，依 place_id 去除重複後回傳 list。
+    回傳的順序固定為 place_types 的順序、再依頁碼，與抵達順序無關。
+    """
+    async def collect():
+        pages = {}
+        async for place_type, page, results in iter_nearby_places(client, lat, lng, api_key, radius,
+                                                                  place_types, **kwargs):
+            pages[(place_types.index(place_type), page)] = results
+        return pages
+
+    pages = asyncio.run(collect())
+    merged, seen = [], set()
+    for key in sorted(pages):
+        for place in pages[key]:
+            if place.get('place_id') not in seen:
+                seen.add(place.get('place_id'))
+                merged.append(place)
+    return merged
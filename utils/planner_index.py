@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from .data_transform import preprocess_travel_df, pick_country_level
+
+AGG_COLUMNS = ['Destination', 'trips', 'median_daily_acc_cost', 'mean_daily_acc_cost',
+               'median_trip_acc_cost', 'mean_trip_acc_cost']
+
+
+class PlannerIndex:
+    """
+    Trip Planner 用的國家層索引，啟動時建立一次、之後唯讀 (Immutable per-destination index)。
+
+    - 每個國家保存依住宿費排序的行程陣列（整趟費用、每日費用、住宿類型代碼），
+      住宿費區間用 searchsorted 直接切片，不必每次重跑 preprocess_travel_df / groupby。
+    - 國家層欄位（CPI、PCE、Safety Index、Visa、Travel Alert）事先用 pick_country_level 取好。
+    """
+
+    def __init__(self, travel_df, df_merged):
+        trips = preprocess_travel_df(travel_df).dropna(subset=['Destination'])
+        acc_types = trips['Accommodation type']
+        self.acc_type_codes = {t: i for i, t in enumerate(sorted(acc_types.dropna().unique()))}
+        codes = acc_types.map(self.acc_type_codes).fillna(-1).to_numpy(dtype=np.int32)
+        all_trip_cost = trips['acc_trip_cost'].to_numpy(dtype=float)
+        all_daily_cost = trips['acc_daily_cost'].to_numpy(dtype=float)
+
+        self.destinations = sorted(trips['Destination'].unique())
+        self._trips = {}
+        for dest, pos in trips.groupby('Destination', sort=True).indices.items():
+            order = pos[np.argsort(all_trip_cost[pos], kind='stable')]
+            arrays = (all_trip_cost[order], all_daily_cost[order], codes[order])
+            for a in arrays:
+                a.setflags(write=False)
+            self._trips[dest] = arrays
+
+        self._country_df = pick_country_level(df_merged, self.destinations).reset_index(drop=True)
+
+    def aggregate(self, cost_min=None, cost_max=None, acc_types=None):
+        """
+        依住宿費區間（含端點）與住宿類型篩選行程，回傳每個國家的聚合結果
+        (trips、每日 / 整趟住宿費的中位數與平均)。沒有行程符合的國家不會出現。
+        """
+        type_codes = None
+        if acc_types:
+            type_codes = np.array([self.acc_type_codes[t] for t in acc_types if t in self.acc_type_codes],
+                                  dtype=np.int32)
+
+        rows = []
+        for dest in self.destinations:
+            trip_cost, daily_cost, codes = self._trips[dest]
+            lo = 0 if cost_min is None else np.searchsorted(trip_cost, float(cost_min), side='left')
+            hi = len(trip_cost) if cost_max is None else np.searchsorted(trip_cost, float(cost_max), side='right')
+            trip_sel, daily_sel = trip_cost[lo:hi], daily_cost[lo:hi]
+            if type_codes is not None:
+                mask = np.isin(codes[lo:hi], type_codes)
+                trip_sel, daily_sel = trip_sel[mask], daily_sel[mask]
+            if len(trip_sel) == 0:
+                continue
+            rows.append((dest, len(trip_sel), np.median(daily_sel), daily_sel.mean(),
+                         np.median(trip_sel), trip_sel.mean()))
+        return pd.DataFrame(rows, columns=AGG_COLUMNS)
+
+    def country_level(self, destinations):
+        """取出指定國家的國家層欄位（與 pick_country_level 相同格式）"""
+        df = self._country_df
+        return df[df['Destination'].isin(destinations)].reset_index(drop=True)
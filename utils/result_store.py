@@ -0,0 +1,38 @@
+import secrets
+import threading
+from collections import OrderedDict
+
+
+class ResultStore:
+    """
+    伺服器端的查詢結果暫存 (Server-side result store)。
+
+    - put() 存一份結果並回傳短 token，瀏覽器端的 dcc.Store 只放 token，不必來回傳整包資料。
+    - 最多 max_entries 份，超過時淘汰最久沒用到的（LRU）；被淘汰的 token 之後 get() 會回傳 None。
+    - 存在本 process 的記憶體中（worksheet 以單一 process 執行）。
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, value):
+        token = secrets.token_urlsafe(8)
+        with self._lock:
+            self._data[token] = value
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return token
+
+    def get(self, token):
+        if not token:
+            return None
+        with self._lock:
+            value = self._data.get(token)
+            if value is not None:
+                self._data.move_to_end(token)
+            return value
+
+    def __len__(self):
+        return len(self._data)
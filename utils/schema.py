@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from .const import MONTH_ORDER
+
+# 轉成 category 的文字欄位（df_merged 中重複度高、每個 worker 都會複製一份的欄位）
+CATEGORY_COLUMNS = [
+    'Destination', 'Continent', 'Currency', 'Travel Alert',
+    'Traveler name', 'Traveler nationality', 'Traveler gender',
+    'Accommodation type', 'Transportation type', 'Start month',
+]
+# 各資料表中同名欄位的別名（country_info_df 的 Country 即 Destination）
+COLUMN_ALIASES = {'Country': 'Destination'}
+
+
+def build_category_dtypes(*frames):
+    """
+    從所有資料表收集 CATEGORY_COLUMNS 的值，建立共用的 CategoricalDtype。
+    類別依字母排序（月份依 MONTH_ORDER），同一份資料每次建立的順序都相同；
+    travel_df 與 country_info_df 共用同一個 Destination 類別，合併後仍維持 category。
+    """
+    values = {col: set() for col in CATEGORY_COLUMNS}
+    for df in frames:
+        for col in df.columns:
+            name = COLUMN_ALIASES.get(col, col)
+            if name in values:
+                values[name].update(str(v) for v in df[col].dropna().unique())
+
+    dtypes = {}
+    for col, seen in values.items():
+        if col == 'Start month':
+            dtypes[col] = pd.CategoricalDtype(MONTH_ORDER)
+        elif seen:
+            dtypes[col] = pd.CategoricalDtype(sorted(seen))
+    return dtypes
+
+
+def narrow_numeric(series):
+    """
+    將數值欄位轉成不失真的最小型別：
+        - 整數 → int8 / int16 / int32（依數值範圍）
+        - 浮點數 → float32，但只在轉換前後數值完全相同時才轉，否則維持 float64
+    """
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        as32 = series.astype(np.float32)
+        same = (as32.astype(np.float64) == series) | series.isna()
+        if same.all():
+            return as32
+    return series
+
+
+def compact_frame(df, category_dtypes):
+    """依 category_dtypes 轉換文字欄位、並把數值欄位縮成最小的安全型別，回傳新的 DataFrame"""
+    out = df.copy()
+    for col in out.columns:
+        name = COLUMN_ALIASES.get(col, col)
+        if name in category_dtypes:
+            values = out[col] if isinstance(out[col].dtype, pd.CategoricalDtype) else out[col].astype(object)
+            out[col] = values.astype(str).where(values.notna()).astype(category_dtypes[name])
+        else:
+            out[col] = narrow_numeric(out[col])
+    return out
+
+
+def memory_report(before, after):
+    """
+    比較轉換前後每個欄位的記憶體用量（df.memory_usage(deep=True)，單位 bytes）。
+    回傳 DataFrame：before / after / saved，最後一列為合計。
+    """
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True),
+        'after': after.memory_usage(deep=True),
+    })
+    report.loc['Total'] = report.sum()
+    report['saved'] = report['before'] - report['after']
+    return report
+
+
+if __name__ == '__main__':
+    # 使用方式：python -m utils.schema（比較 df_merged 轉換前後的記憶體用量）
+    from .snapshot import TRAVEL_PATH, COUNTRY_INFO_PATH, build_datasets
+    from .data_clean import travel_data_clean, countryinfo_data_clean, data_merge
+
+    before = data_merge(travel_data_clean(pd.read_csv(TRAVEL_PATH)),
+                        countryinfo_data_clean(pd.read_csv(COUNTRY_INFO_PATH)))
+    after = build_datasets()[2]
+    print(memory_report(before, after))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .data_clean import travel_data_clean_chunked, countryinfo_data_clean, data_merge
+from .schema import build_category_dtypes, compact_frame
+
+SNAPSHOT_VERSION = 2
+DEFAULT_SNAPSHOT_DIR = './cache/snapshot'
+TRAVEL_PATH = './data/Travel_dataset.csv'
+COUNTRY_INFO_PATH = './data/country_info.csv'
+FRAME_NAMES = ['travel_df', 'country_info_df', 'df_merged']
+
+
+def source_hash(paths):
+    """
+    計算快照版本：SNAPSHOT_VERSION + 原始 CSV + 清理程式碼 (data_clean.py、schema.py) 的內容雜湊。
+    任何一個有變動，就會得到不同的版本，自動重建快照。
+    """
+    h = hashlib.sha256(f'v{SNAPSHOT_VERSION}'.encode())
+    here = os.path.dirname(__file__)
+    code_paths = [os.path.join(here, 'data_clean.py'), os.path.join(here, 'schema.py')]
+    for path in list(paths) + code_paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def build_datasets(travel_path=TRAVEL_PATH, country_info_path=COUNTRY_INFO_PATH):
+    """
+    從 CSV 讀取並清理、合併，回傳 (travel_df, country_info_df, df_merged)。
+    文字欄位轉成共用類別的 category、數值欄位縮成最小的安全型別（見 ./utils/schema.py）。
+    """
+    travel_df = travel_data_clean_chunked(travel_path)
+    country_info_df = countryinfo_data_clean(pd.read_csv(country_info_path))
+
+    category_dtypes = build_category_dtypes(travel_df, country_info_df)
+    travel_df = compact_frame(travel_df, category_dtypes)
+    country_info_df = compact_frame(country_info_df, category_dtypes)
+    df_merged = compact_frame(data_merge(travel_df, country_info_df), category_dtypes)
+    return travel_df, country_info_df, df_merged
+
+
+def save_snapshot(frames, snapshot_path):
+    """
+    將各 DataFrame 存成未壓縮的 Feather 檔（可以直接 memory-map）。
+    先寫到暫存資料夾再改名，多個 worker 同時建立時不會讀到寫一半的檔案。
+    """
+    parent = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent)
+    for name, df in zip(FRAME_NAMES, frames):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        feather.write_feather(table, os.path.join(tmp_dir, f'{name}.feather'), compression='uncompressed')
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'frames': FRAME_NAMES}, f)
+    try:
+        os.rename(tmp_dir, snapshot_path)
+    except OSError:
+        # 別的 worker 已經建好同一版本
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_snapshot(snapshot_path):
+    """以 memory-map 方式讀取快照，回傳 (travel_df, country_info_df, df_merged)"""
+    return tuple(
+        feather.read_table(os.path.join(snapshot_path, f'{name}.feather'), memory_map=True).to_pandas()
+        for name in FRAME_NAMES
+    )
+
+
+def load_datasets(travel_path=TRAVEL_PATH, country_info_path=COUNTRY_INFO_PATH,
+                  snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    取得清理後的資料集 (travel_df, country_info_df, df_merged) 與資料版本。
+
+    有對應版本的快照就直接讀取；沒有（第一次啟動或 CSV 有變動）才重新清理並寫入快照，
+    同時刪掉舊版本的快照。
+
+    回傳: ((travel_df, country_info_df, df_merged), version)
+    """
+    version = source_hash([travel_path, country_info_path])
+    snapshot_path = os.path.join(snapshot_dir, version)
+
+    if os.path.exists(os.path.join(snapshot_path, 'manifest.json')):
+        return load_snapshot(snapshot_path), version
+
+    frames = build_datasets(travel_path, country_info_path)
+    save_snapshot(frames, snapshot_path)
+    for old in os.listdir(snapshot_dir):
+        if old != version and not old.startswith('tmp'):
+            shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+    return frames, version
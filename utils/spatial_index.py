@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180  # 緯度 1 度約 111.2 km
+DEFAULT_CELL_DEG = 0.05  # 網格大小（度），台灣約 5.5 km × 5 km
+
+_EMPTY = np.array([], dtype=np.intp)
+_EMPTY_DIST = np.array([], dtype=np.float64)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """大圓距離 (km)，參數可以是純量或 numpy 陣列（會 broadcast）"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GridIndex:
+    """
+    經緯度網格索引 (Grid bucket index)。
+
+    - 每個點依 (floor(lat / cell), floor(lng / cell)) 分到一格，點依格子排序後存成連續陣列，
+      每格只記錄 [start, end) 區段。
+    - 查詢只取查詢點附近幾格的點計算 haversine 距離；要掃描的格子比有資料的格子還多時直接全部計算。
+    """
+
+    def __init__(self, lat, lng, positions=None, cell_deg=DEFAULT_CELL_DEG):
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        positions = np.arange(len(lat)) if positions is None else np.asarray(positions)
+        self.cell_deg = cell_deg
+
+        rows = np.floor(lat / cell_deg).astype(np.int64)
+        cols = np.floor(lng / cell_deg).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.lat, self.lng, self.positions = lat[order], lng[order], positions[order]
+        rows, cols = rows[order], cols[order]
+
+        starts = np.flatnonzero(np.r_[True, (np.diff(rows) != 0) | (np.diff(cols) != 0)]) if len(rows) else _EMPTY
+        ends = np.r_[starts[1:], len(rows)]
+        self.cells = {(int(rows[s]), int(cols[s])): (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _ring_slots(self, row, col, ring):
+        """距離查詢點所在格子剛好 ring 格的那一圈格子，回傳其中有資料的陣列位置"""
+        if ring == 0:
+            keys = [(row, col)]
+        else:
+            keys = [(row + dr, col + dc) for dr in (-ring, ring) for dc in range(-ring, ring + 1)]
+            keys += [(row + dr, col + dc) for dc in (-ring, ring) for dr in range(-ring + 1, ring)]
+        slots = [np.arange(*self.cells[k]) for k in keys if k in self.cells]
+        return np.concatenate(slots) if slots else _EMPTY
+
+    def _lng_km_per_deg(self, lat, ring):
+        """
+        ring 圈範圍內，經度 1 度的最短距離 (km)（越靠近極區越短）。
+        同緯度兩點的大圓距離比沿緯線短一點，乘上 0.9 留餘裕。
+        """
+        worst = min(90.0, abs(lat) + (ring + 1) * self.cell_deg)
+        return 0.9 * KM_PER_DEG * max(np.cos(np.radians(worst)), 1e-6)
+
+    def _all(self, lat, lng):
+        return np.arange(len(self.positions)), haversine_km(lat, lng, self.lat, self.lng)
+
+    def within_radius(self, lat, lng, radius_km):
+        """半徑 radius_km 內的點：回傳 (原始列位置, 距離 km)，依距離由近到遠"""
+        if not len(self.positions) or radius_km < 0:
+            return _EMPTY, _EMPTY_DIST
+        row, col = int(np.floor(lat / self.cell_deg)), int(np.floor(lng / self.cell_deg))
+        lat_rings = int(np.ceil(radius_km / (KM_PER_DEG * self.cell_deg)))
+        lng_rings = int(np.ceil(radius_km / (self._lng_km_per_deg(lat, lat_rings) * self.cell_deg)))
+
+        if (2 * lat_rings + 1) * (2 * lng_rings + 1) > len(self.cells):
+            slots, dist = self._all(lat, lng)
+        else:
+            found = [np.arange(*self.cells[(r, c)])
+                     for r in range(row - lat_rings, row + lat_rings + 1)
+                     for c in range(col - lng_rings, col + lng_rings + 1)
+                     if (r, c) in self.cells]
+            slots = np.concatenate(found) if found else _EMPTY
+            dist = haversine_km(lat, lng, self.lat[slots], self.lng[slots])
+
+        keep = dist <= radius_km
+        slots, dist = slots[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')
+        return self.positions[slots[order]], dist[order]
+
+    def nearest(self, lat, lng, k=10):
+        """最近的 k 個點：回傳 (原始列位置, 距離 km)，依距離由近到遠"""
+        n = len(self.positions)
+        if not n or k <= 0:
+            return _EMPTY, _EMPTY_DIST
+        row, col = int(np.floor(lat / self.cell_deg)), int(np.floor(lng / self.cell_deg))
+        slots, dist = [], []
+        scanned, ring = 0, 0
+        while True:
+            new = self._ring_slots(row, col, ring)
+            slots.append(new)
+            dist.append(haversine_km(lat, lng, self.lat[new], self.lng[new]))
+            scanned += len(new)
+            # 已掃描的範圍內，離查詢點至少 ring 格距離的點都已找到
+            covered = ring * self.cell_deg * min(KM_PER_DEG, self._lng_km_per_deg(lat, ring))
+            all_dist = np.concatenate(dist)
+            if scanned == n:
+                all_slots = np.concatenate(slots)
+                break
+            if np.count_nonzero(all_dist <= covered) >= k:
+                all_slots = np.concatenate(slots)
+                break
+            ring += 1
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                all_slots, all_dist = self._all(lat, lng)
+                break
+
+        k = min(k, len(all_dist))
+        top = np.argpartition(all_dist, k - 1)[:k]
+        top = top[np.argsort(all_dist[top], kind='stable')]
+        return self.positions[all_slots[top]], all_dist[top]
+
+
+class SpatialIndex:
+    """
+    POI 的空間索引：全部 POI 一個 GridIndex，另外每個類別各一個，類別篩選時不必掃描其他類別的點。
+    沒有座標（NaN 或超出範圍）的列不會被索引。
+    """
+
+    def __init__(self, df, lat_col='Lat', lng_col='Lng', category_col=None, cell_deg=DEFAULT_CELL_DEG):
+        lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype=np.float64)
+        lng = pd.to_numeric(df[lng_col], errors='coerce').to_numpy(dtype=np.float64)
+        valid = np.isfinite(lat) & np.isfinite(lng) & (np.abs(lat) <= 90) & (np.abs(lng) <= 180)
+        positions = np.flatnonzero(valid)
+        self.lat, self.lng = lat, lng
+        self.all = GridIndex(lat[valid], lng[valid], positions, cell_deg)
+        self.by_category = {}
+        if category_col is not None:
+            categories = df[category_col].to_numpy()[valid]
+            for category, idx in pd.Series(categories).groupby(categories).indices.items():
+                self.by_category[category] = GridIndex(lat[positions[idx]], lng[positions[idx]], positions[idx], cell_deg)
+
+    def _grid(self, category):
+        if category is None:
+            return self.all
+        return self.by_category.get(category)
+
+    def nearest(self, lat, lng, k=10, category=None):
+        """最近的 k 個 POI（可指定類別）：回傳 (列位置, 距離 km)"""
+        grid = self._grid(category)
+        return grid.nearest(lat, lng, k) if grid is not None else (_EMPTY, _EMPTY_DIST)
+
+    def within_radius(self, lat, lng, radius_km, category=None):
+        """(lat, lng) 半徑 radius_km 內的 POI（可指定類別）：回傳 (列位置, 距離 km)"""
+        grid = self._grid(category)
+        return grid.within_radius(lat, lng, radius_km) if grid is not None else (_EMPTY, _EMPTY_DIST)
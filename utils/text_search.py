@@ -0,0 +1,168 @@
+import hashlib
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = './cache/text_index'
+
+# 中日韓文字一段一段切出來，英數字以單字為單位
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+')
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+_EMPTY = np.array([], dtype=np.intp)
+
+
+def _runs(text):
+    text = unicodedata.normalize('NFKC', str(text or '')).lower()
+    return _TOKEN_RE.findall(text)
+
+
+def tokenize(text):
+    """
+    建索引用的斷詞：中文取單字 + 相鄰兩字 (character bigrams)，英數字取整個單字。
+    例如「金門咖啡 cafe」→ 金、門、咖、啡、金門、門咖、咖啡、cafe
+    """
+    tokens = []
+    for run in _runs(text):
+        if _CJK_RE.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def query_tokens(query):
+    """查詢用的斷詞：兩個字以上的中文只取 bigram（單字太常見），只有一個字時才用單字"""
+    tokens = []
+    for run in _runs(query):
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return list(dict.fromkeys(tokens))
+
+
+def fields_hash(fields):
+    """索引版本：INDEX_VERSION + 各欄位權重與文字內容的雜湊，資料有變動就重建"""
+    h = hashlib.sha256(f'v{INDEX_VERSION}'.encode())
+    for texts, weight in fields:
+        h.update(f'|{weight}|{len(texts)}|'.encode())
+        for text in texts:
+            h.update(str(text).encode())
+            h.update(b'\0')
+    return h.hexdigest()[:16]
+
+
+class TextIndex:
+    """
+    POI 名稱 / 介紹的倒排索引 (Inverted index with CJK bigrams)。
+
+    - 每個 token 對應一段 (列位置, 權重) 的 posting，全部存在幾個連續的 numpy 陣列（CSR 格式）。
+    - 權重 = Σ 欄位權重 × (1 + log 出現次數)，名稱的權重比介紹高。
+    - 查詢時依「符合的查詢 token 數」排序，同數量再依 idf × 權重 的總分排序。
+    """
+
+    def __init__(self, vocab, offsets, doc_ids, weights, n_docs):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = int(n_docs)
+        self.token_ids = {token: i for i, token in enumerate(vocab.tolist())}
+        df = np.diff(offsets)
+        self.idf = np.log1p(self.n_docs / np.maximum(df, 1)).astype(np.float32)
+
+    @classmethod
+    def build(cls, fields):
+        """
+        fields: [(文字序列, 欄位權重), ...]，每個文字序列的長度都等於文件數（列數）。
+        """
+        n_docs = len(fields[0][0]) if fields else 0
+        tokens, docs, weights = [], [], []
+        for doc in range(n_docs):
+            tf = Counter()
+            for texts, weight in fields:
+                for token, count in Counter(tokenize(texts[doc])).items():
+                    tf[token] += weight * (1 + math.log(count))
+            tokens.extend(tf.keys())
+            docs.extend([doc] * len(tf))
+            weights.extend(tf.values())
+
+        vocab, codes = np.unique(np.asarray(tokens, dtype=str), return_inverse=True)
+        order = np.lexsort((np.asarray(docs), codes))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(vocab)), out=offsets[1:])
+        return cls(
+            vocab,
+            offsets,
+            np.asarray(docs, dtype=np.int32)[order],
+            np.asarray(weights, dtype=np.float32)[order],
+            n_docs,
+        )
+
+    def save(self, path):
+        """存成 .npz（先寫暫存檔再改名，不會留下寫一半的檔案）"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, vocab=self.vocab, offsets=self.offsets, doc_ids=self.doc_ids,
+                     weights=self.weights, n_docs=np.int64(self.n_docs))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['vocab'], data['offsets'], data['doc_ids'], data['weights'], data['n_docs'])
+
+    def postings(self, token):
+        """token 的 (列位置, 權重)；不在索引中則為空陣列"""
+        i = self.token_ids.get(token)
+        if i is None:
+            return _EMPTY, _EMPTY
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.doc_ids[start:end], self.weights[start:end] * self.idf[i]
+
+    def search(self, query, limit=None):
+        """
+        回傳 (列位置, 分數)，依相關程度由高到低排列。
+        至少符合一個查詢 token 的列才會出現；查詢沒有可用的 token 時回傳空結果。
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return _EMPTY, np.array([], dtype=np.float32)
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        matched = np.zeros(self.n_docs, dtype=np.int16)
+        for token in tokens:
+            ids, w = self.postings(token)
+            # 同一個 token 的 posting 中列位置不重複，可以直接累加
+            scores[ids] += w
+            matched[ids] += 1
+        hits = np.flatnonzero(matched)
+        order = np.lexsort((hits, -scores[hits], -matched[hits]))
+        hits = hits[order][:limit]
+        return hits, scores[hits]
+
+
+def load_text_index(fields, index_dir=DEFAULT_INDEX_DIR):
+    """
+    取得 fields 的倒排索引：有對應版本的檔案就直接讀取，沒有才建立並存檔，同時刪掉舊版本。
+    """
+    version = fields_hash(fields)
+    path = os.path.join(index_dir, f'{version}.npz')
+    if os.path.exists(path):
+        return TextIndex.load(path)
+
+    index = TextIndex.build(fields)
+    index.save(path)
+    for old in os.listdir(index_dir):
+        if old != f'{version}.npz' and old.endswith('.npz'):
+            try:
+                os.remove(os.path.join(index_dir, old))
+            except OSError:
+                pass
+    return index
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
@@ -6,6 +8,8 @@ import dash_bootstrap_components as dbc
 import plotly.express as px
 import plotly.colors as colors
 from .data_validation import fmt
+from .const import MAP_METRICS, MONTH_ORDER
+from .geo_index import country_table
 
 def build_compare_figure(df_result, chart_type, title):
     metric_columns = [col for col in df_result.columns if col != 'Country']
@@ -113,9 +117,14 @@ def build_table_component(out):
     )
     return table    
 
+def filter_geo(df, value, geo_index=None):
+    """取出洲或國家等於 value 的列；有 geo_index 時直接依預先分組的位置取列"""
+    if geo_index is not None:
+        return geo_index.rows(value)
+    return df[(df['Continent'] == value) | (df['Destination'] == value)]
 
 # 長條圖
-def generate_bar(df, dropdown_value):
+def generate_bar(df, dropdown_value, geo_index=None, count_cube=None):
     if dropdown_value is None:
         # 回傳一個空的圖表，或在這裡設置一個預設訊息
         fig_bar = px.bar(title="請選擇有效的選項")
@@ -124,17 +133,18 @@ def generate_bar(df, dropdown_value):
         return fig_bar
 
     # 長條圖的x軸要依照月份順序排列
-    # 定義月份的順序
-    month_order = ['January', 'February', 'March', 'April', 'May', 
-                'June', 'July', 'August', 'September', 'October', 
-                'November', 'December']
+    month_order = MONTH_ORDER
 
-    # 過濾資料
-    df_group = df[(df['Continent'] == dropdown_value) | (df['Destination'] == dropdown_value)]
+    if count_cube is not None:
+        # 直接查預先彙總好的月份次數
+        month_counts = pd.DataFrame({'Start month': month_order, 'count': count_cube.month_table(dropdown_value)})
+    else:
+        # 過濾資料
+        df_group = filter_geo(df, dropdown_value, geo_index)
 
-    # 計算 'Start month' 的數量
-    month_counts = df_group['Start month'].value_counts().reindex(month_order, fill_value=0).reset_index()
-    month_counts.columns = ['Start month', 'count']  # 設定新列名
+        # 計算 'Start month' 的數量
+        month_counts = df_group['Start month'].value_counts().reindex(month_order, fill_value=0).reset_index()
+        month_counts.columns = ['Start month', 'count']  # 設定新列名
 
     # 計算百分比
     month_counts['percentage'] = (month_counts['count'] / month_counts['count'].sum()) * 100
@@ -157,7 +167,7 @@ def generate_bar(df, dropdown_value):
 
     return fig_bar
 
-def generate_pie(df, dropdown_value_1, dropdown_value_2):
+def generate_pie(df, dropdown_value_1, dropdown_value_2, geo_index=None, count_cube=None):
 
     if dropdown_value_1 is None or dropdown_value_2 is None:
         # 回傳一個空的圖表，或在這裡設置一個預設訊息
@@ -166,11 +176,21 @@ def generate_pie(df, dropdown_value_1, dropdown_value_2):
     
         return fig_pie
  
-    # 過濾出符合 `dropdown_value_1` 的資料
-    df_group = df[(df['Continent'] == dropdown_value_1) | (df['Destination'] == dropdown_value_1)]
-    
-    # 使用 `value_counts()` 計算 `dropdown_value_2` 欄位的次數，並重置索引以創建新的資料框
-    df_counts = df_group[dropdown_value_2].value_counts().reset_index(name = 'count')
+    if count_cube is not None:
+        # 直接查預先彙總好的類別次數（順序與 value_counts 相同）
+        labels, counts = count_cube.field_table(dropdown_value_1, dropdown_value_2)
+        df_counts = pd.DataFrame({dropdown_value_2: labels, 'count': counts})
+    else:
+        # 過濾出符合 `dropdown_value_1` 的資料
+        df_group = filter_geo(df, dropdown_value_1, geo_index)
+
+        # 使用 `value_counts()` 計算 `dropdown_value_2` 欄位的次數，並重置索引以創建新的資料框
+        # 精簡後的無序 category 共用所有組的類別 → 轉回 object 計數，只列出這一組實際出現的值
+        # （有序類別例如年齡區間維持原本行為，列出 0 次的區間）
+        col = df_group[dropdown_value_2]
+        if isinstance(col.dtype, pd.CategoricalDtype) and not col.dtype.ordered:
+            col = col.astype(object)
+        df_counts = col.value_counts().reset_index(name = 'count')
     
     # 建立圓餅圖，使用 `dropdown_value_2` 作為標籤，`count` 作為數值
     fig_pie = px.pie(
@@ -186,7 +206,30 @@ def generate_pie(df, dropdown_value_1, dropdown_value_2):
 
     return fig_pie
 
-def generate_map(df, dropdown_value_1, dropdown_value_2):
+def choropleth_figure(countries, title, metric):
+    """國家表（見 geo_index.country_table）的 choropleth，每個國家一個位置"""
+    frame = countries.rename(columns={'Destination': 'Country', 'iso': 'Destination'})
+    fig_choropleth = px.choropleth(frame,
+                                    locations="Destination",
+                                    color=metric,
+                                    hover_name="Country",
+                                    title=title,
+                                    projection="natural earth",
+                                    color_continuous_scale='Viridis')
+    fig_choropleth.update_layout(template='plotly_dark', font=dict(color='#deb522'))
+    return fig_choropleth
+
+
+@lru_cache(maxsize=32)
+def choropleth_base(geo_index, continent):
+    """
+    某洲（None 代表全部）的地圖底圖：國家位置、hover 名稱、投影與版面只建一次，
+    之後每個指標只替換 z 值與色條標題（見 generate_map）。存成 dict，複製時不必重新驗證。
+    """
+    return choropleth_figure(geo_index.continent_countries(continent), None, MAP_METRICS[0]).to_dict()
+
+
+def generate_map(df, dropdown_value_1, dropdown_value_2, geo_index=None):
 
     if dropdown_value_1 is None and dropdown_value_2 is None:
         # 回傳一個空的圖表，或在這裡設置一個預設訊息
@@ -195,52 +238,22 @@ def generate_map(df, dropdown_value_1, dropdown_value_2):
     
         return fig_choropleth
 
-    country_mapping = {
-        'USA': 'USA',
-        'UK': 'GB-ENG',
-        'France': 'FRA',
-        'Canada': 'CAN',
-        'Germany': 'DEU',
-        'Japan': 'JPN',
-        'Australia': 'AUS',
-        'Italy': 'ITA',
-        'Spain': 'ESP',
-        'Mexico': 'MEX',
-        'New Zealand': 'NZL',
-        'South Korea': 'KOR',
-        'United Arab Emirates': 'ARE',
-        'Netherlands': 'NLD',
-        'South Africa': 'ZAF',
-        'Thailand': 'THA',
-        'Egypt': 'EGY',
-        'Brazil': 'BRA',
-        'Morocco': 'MAR',
-        'Indonesia': 'IDN',
-        'Scotland': 'GB-SCT',
-        'Greek': 'GRC',
-        'Cambodia': 'KHM',  
-    }
-
-    if dropdown_value_1 != None:
-        df_group = df[df['Continent'] == dropdown_value_1]  
-    else:
-        df_group = df.copy()
-
-    df_group['Destination'] = df_group['Destination'].map(country_mapping)
-
-    fig_choropleth = px.choropleth(df_group, 
-                                    locations="Destination",
-                                    color=dropdown_value_2,
-                                    hover_name="Destination",
-                                    title=f"{dropdown_value_1} - {dropdown_value_2}",
-                                    projection="natural earth",
-                                    color_continuous_scale='Viridis')
-    
-    fig_choropleth.update_layout(template='plotly_dark', font=dict(color='#deb522'))
-    
+    title = f"{dropdown_value_1} - {dropdown_value_2}"
+    if geo_index is None or dropdown_value_2 not in MAP_METRICS:
+        df_group = df if dropdown_value_1 is None else df[df['Continent'] == dropdown_value_1]
+        return choropleth_figure(country_table(df_group), title, dropdown_value_2)
+
+    # 複製快取的底圖（建立時已驗證過，不再逐一驗證屬性），只換上這個指標的值
+    countries = geo_index.continent_countries(dropdown_value_1)
+    fig_choropleth = go.Figure(choropleth_base(geo_index, dropdown_value_1), _validate=False)
+    fig_choropleth.update_traces(
+        z=countries[dropdown_value_2].to_numpy(),
+        hovertemplate=f"<b>%{{hovertext}}</b><br><br>Destination=%{{location}}<br>{dropdown_value_2}=%{{z}}<extra></extra>"
+    )
+    fig_choropleth.update_layout(title_text=title, coloraxis_colorbar_title_text=dropdown_value_2)
     return fig_choropleth
 
-def generate_box(df, dropdown_value_1, dropdown_value_2):
+def generate_box(df, dropdown_value_1, dropdown_value_2, geo_index=None):
 
     if dropdown_value_1 is None or dropdown_value_2 is None:
         # 回傳一個空的圖表，或在這裡設置一個預設訊息
@@ -249,7 +262,7 @@ def generate_box(df, dropdown_value_1, dropdown_value_2):
     
         return fig_boxplot
 
-    df_group = df[(df['Continent'] == dropdown_value_1) | (df['Destination'] == dropdown_value_1)]
+    df_group = filter_geo(df, dropdown_value_1, geo_index)
     
     fig_boxplot = px.box(df_group, x=dropdown_value_2, title=f'{dropdown_value_1} - {dropdown_value_2}')
     fig_boxplot.update_traces(marker=dict(color='#deb522'))